@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the analysis scripts
+Handles Google Sheets auth and a local Parquet snapshot cache keyed by the
+sheet's Drive revision so repeat runs skip the download + parse entirely.
+"""
+
+import json
+import os
+import sys
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import gspread
+import numpy as np
+import pandas as pd
+from google.oauth2.credentials import Credentials
+
+GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "1J2FlN_tADPWx9HBnuXK68wNxC3yhfGMnB3czZOYLNSg")
+
+DECISION_TYPES = ('ACCEPT', 'REVIEW', 'REVISE')
+
+# Buffered stdout: the reports emit a few hundred lines, so collect them and
+# write once instead of paying a syscall per line. Pass --stream to print
+# incrementally (useful on an interactive terminal).
+_OUT = []
+_STREAM = '--stream' in sys.argv
+
+
+def p(*args):
+    """Buffered drop-in for print()"""
+    if _STREAM:
+        print(*args)
+    else:
+        _OUT.append(' '.join(str(a) for a in args))
+
+
+def flush_output():
+    """Emit all buffered lines with a single stdout write"""
+    if _OUT:
+        sys.stdout.write('\n'.join(_OUT) + '\n')
+        sys.stdout.flush()
+        _OUT.clear()
+
+# Optional JIT support for the per-decision reductions
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _reduce_by_decision(scores, dcode, n_groups):
+        """Single native pass over the score matrix: nan-aware min/max/sum/count per (decision, column)"""
+        n, m = scores.shape
+        out_min = np.full((n_groups, m), np.inf)
+        out_max = np.full((n_groups, m), -np.inf)
+        out_sum = np.zeros((n_groups, m))
+        out_cnt = np.zeros((n_groups, m))
+        for i in range(n):
+            d = dcode[i]
+            if d < 0:
+                continue
+            for j in range(m):
+                v = scores[i, j]
+                if not np.isnan(v):
+                    if v < out_min[d, j]:
+                        out_min[d, j] = v
+                    if v > out_max[d, j]:
+                        out_max[d, j] = v
+                    out_sum[d, j] += v
+                    out_cnt[d, j] += 1
+        return out_min, out_max, out_sum, out_cnt
+
+SCOPES = [
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+    'https://www.googleapis.com/auth/drive.readonly'
+]
+
+CACHE_FILE = 'sheet_cache.parquet'
+CACHE_META_FILE = 'sheet_cache.meta.json'
+
+# Rows per ranged request when fetching the sheet in parallel chunks
+FETCH_CHUNK_ROWS = 10000
+
+
+def _fetch_values(sheet):
+    """
+    Fetch columns A:I, splitting large sheets into ranged requests that run
+    on a thread pool so later chunks download while earlier ones are being
+    consumed.
+    """
+    total = sheet.row_count
+    if total <= FETCH_CHUNK_ROWS:
+        return sheet.get('A:I', value_render_option='UNFORMATTED_VALUE')
+
+    ranges = [f'A{start}:I{min(start + FETCH_CHUNK_ROWS - 1, total)}'
+              for start in range(1, total + 1, FETCH_CHUNK_ROWS)]
+    values = []
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        chunks = pool.map(
+            lambda r: sheet.get(r, value_render_option='UNFORMATTED_VALUE'),
+            ranges
+        )
+        # map() yields in order, so each chunk is appended while the
+        # remaining requests are still in flight
+        for chunk in chunks:
+            values.extend(chunk)
+    return values
+
+
+# Lazily-initialised singletons: parsing token.json and the gspread/TLS
+# handshake are one-time costs, not per-call costs
+_CREDS = None
+_GC = None
+_SPREADSHEETS = {}
+
+
+def get_client():
+    """Authorize gspread once and reuse the client across calls"""
+    global _CREDS, _GC
+    if _GC is None:
+        _CREDS = Credentials.from_authorized_user_file('token.json', SCOPES)
+        _GC = gspread.authorize(_CREDS)
+    return _GC
+
+
+def get_spreadsheet(sheet_id=GOOGLE_SHEET_ID):
+    """Open a spreadsheet handle once per sheet id"""
+    if sheet_id not in _SPREADSHEETS:
+        print("   📡 Connecting to Google Sheets...")
+        _SPREADSHEETS[sheet_id] = get_client().open_by_key(sheet_id)
+    return _SPREADSHEETS[sheet_id]
+
+
+def _read_cache(sheet_id, revision):
+    """Return the cached DataFrame if it matches (sheet_id, revision), else None"""
+    if not revision or not os.path.exists(CACHE_FILE) or not os.path.exists(CACHE_META_FILE):
+        return None
+    try:
+        with open(CACHE_META_FILE, 'r') as f:
+            meta = json.load(f)
+        if meta.get('sheet_id') == sheet_id and meta.get('revision') == revision:
+            return pd.read_parquet(CACHE_FILE)
+    except Exception:
+        pass
+    return None
+
+
+def _write_cache(df, sheet_id, revision):
+    """Best-effort snapshot write; cache misses just re-download next run"""
+    if not revision:
+        return
+    try:
+        df.to_parquet(CACHE_FILE)
+        with open(CACHE_META_FILE, 'w') as f:
+            json.dump({'sheet_id': sheet_id, 'revision': revision}, f)
+    except Exception:
+        pass
+
+
+def load_sheet(sheet_id=GOOGLE_SHEET_ID):
+    """
+    Load the first worksheet as a DataFrame.
+
+    Uses the local Parquet snapshot when the sheet's Drive revision matches,
+    so only the tiny metadata request hits the network on repeat runs.
+    """
+    spreadsheet = get_spreadsheet(sheet_id)
+
+    revision = None
+    try:
+        revision = spreadsheet.lastUpdateTime
+    except Exception:
+        pass
+
+    cached = _read_cache(sheet_id, revision)
+    if cached is not None:
+        print(f"   💾 Using cached snapshot ({len(cached)} rows)")
+        return cached
+
+    sheet = spreadsheet.sheet1
+
+    print("   ⬇️ Downloading data...")
+    # Only columns A:I are analyzed; UNFORMATTED_VALUE returns numeric cells
+    # already typed so downstream numeric coercion has almost nothing to do
+    all_values = _fetch_values(sheet)
+
+    df = pd.DataFrame(all_values[1:], columns=all_values[0])
+    _write_cache(df, sheet_id, revision)
+    return df
+
+
+def normalize_decision_labels(series):
+    """Upper/strip the handful of unique decision labels and broadcast back by code"""
+    codes, uniques = pd.factorize(series.astype(str), sort=False)
+    return pd.Index(uniques).str.upper().str.strip().to_numpy()[codes]
+
+
+def score_matrix(df, cols):
+    """Contiguous (n, len(cols)) float64 matrix of the given columns"""
+    return np.column_stack([
+        pd.to_numeric(df[col], errors='coerce') for col in cols
+    ]).astype(np.float64)
+
+
+def quantiles_by_partition(sub, qs):
+    """
+    Nearest-rank quantiles via quickselect: one np.partition pass per column
+    with all the cut indices yields every requested quantile, instead of a
+    full sort per quantile.
+
+    Returns a (len(qs), n_cols) array.
+    """
+    out = np.full((len(qs), sub.shape[1]), np.nan)
+    for j in range(sub.shape[1]):
+        a = sub[:, j]
+        a = a[~np.isnan(a)]
+        if a.size:
+            ks = [int(round(q * (a.size - 1))) for q in qs]
+            part = np.partition(a, ks)
+            out[:, j] = part[ks]
+    return out
+
+
+def summarise_by_decision(scores, decisions, decision_order=DECISION_TYPES):
+    """
+    Per-decision summary stats over the score matrix.
+
+    Returns (subsets, stats, qs):
+        subsets: decision -> (rows, cols) score slab
+        stats:   decision -> {'min'|'max'|'mean': per-column array}
+        qs:      decision -> (4, cols) array of p05/p10/p90/p95 rows
+    """
+    subsets = {d: scores[decisions == d] for d in decision_order}
+
+    stats = {}
+    qs = {}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns
+        if NUMBA_AVAILABLE:
+            # One compiled scan over all rows computes min/max/mean for every
+            # (decision, column) pair; quantiles still need the sorted subsets
+            dcode = np.full(len(decisions), -1, dtype=np.int8)
+            for k, d in enumerate(decision_order):
+                dcode[decisions == d] = k
+            g_min, g_max, g_sum, g_cnt = _reduce_by_decision(scores, dcode, len(decision_order))
+            for k, d in enumerate(decision_order):
+                if subsets[d].size:
+                    cnt = g_cnt[k]
+                    stats[d] = {
+                        'min': np.where(cnt > 0, g_min[k], np.nan),
+                        'max': np.where(cnt > 0, g_max[k], np.nan),
+                        'mean': np.where(cnt > 0, g_sum[k] / np.maximum(cnt, 1), np.nan),
+                    }
+                    qs[d] = quantiles_by_partition(subsets[d], (0.05, 0.10, 0.90, 0.95))
+        else:
+            # The 0th/100th quantiles double as min/max, so one partition pass
+            # per column yields every order statistic the report needs
+            for d, sub in subsets.items():
+                if sub.size:
+                    pcts = quantiles_by_partition(sub, (0, 0.05, 0.10, 0.90, 0.95, 1))
+                    stats[d] = {
+                        'min': pcts[0],
+                        'max': pcts[5],
+                        'mean': np.nanmean(sub, axis=0),
+                    }
+                    qs[d] = pcts[1:5]  # rows: p05, p10, p90, p95
+
+    return subsets, stats, qs
@@ -104,6 +104,9 @@ async def main():
     finally:
         print(f"\n=== Session Complete ===")
         print(f"Total tasks completed: {task_logger.get_completed_count()}")
+        # Convert the CSV task journal into the Excel workbook once
+        # (openpyxl write is slow - keep it off the event loop)
+        await asyncio.to_thread(task_logger.finalize)
         await BrowserManager.close()
 
 if __name__ == "__main__":
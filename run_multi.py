@@ -3,8 +3,15 @@ Multi-Account Runner for Snorkel Bot
 Chạy nhiều account với rotation: mỗi cặp chạy 15 task rồi đổi
 """
 import asyncio
+import atexit
+import hashlib
+import logging
 import os
-import re
+import pickle
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 from src.account_monitor import AccountMonitor
@@ -25,10 +32,71 @@ ACTION_TO_STATUS = {
 # Configuration
 TASKS_PER_ROTATION = 100  # Each pair runs 15 tasks then switch
 MAX_RESTART_ATTEMPTS = 3  # Max times to restart a crashed account
+MAX_NOTES = 200  # Truncate notes logged per task
+
+# Reused for every blank task instead of rebuilding the dict per iteration
+BLANK_DECISION = {
+    "action": "REJECT",
+    "rejection_notes": "No Task ID Present.",
+    "notes": "No Task ID Present."
+}
+
+
+CONFIG_CACHE_FILE = os.path.join('.cache', 'accounts.config.pkl')
+
+# Task-loop output goes through a queue to a background writer thread, so
+# console flush latency never blocks the asyncio event loop; %s args are
+# only formatted when the record is actually emitted
+log = logging.getLogger('snorkel')
+if not log.handlers:
+    _log_queue = queue.Queue(-1)
+    log.addHandler(QueueHandler(_log_queue))
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    _listener = QueueListener(_log_queue, logging.StreamHandler(sys.stdout))
+    _listener.start()
+    atexit.register(_listener.stop)  # drain queued records on exit
 
 
 def load_config(config_file="accounts.config"):
-    """Load config from file"""
+    """Load config from file, reusing the parsed copy while the file is unchanged"""
+    try:
+        st = os.stat(config_file)
+    except OSError:
+        return _parse_config(config_file)
+
+    key = (st.st_mtime_ns, st.st_size)
+    try:
+        with open(CONFIG_CACHE_FILE, 'rb') as f:
+            payload = pickle.load(f)
+        if payload.get('key') == key:
+            return payload['config']
+    except Exception:
+        pass  # missing/stale/corrupt cache -> re-parse
+
+    config = _parse_config(config_file)
+    try:
+        os.makedirs(os.path.dirname(CONFIG_CACHE_FILE), exist_ok=True)
+        with open(CONFIG_CACHE_FILE, 'wb') as f:
+            pickle.dump({'key': key, 'config': config}, f)
+    except Exception:
+        pass  # cache write is best-effort
+    return config
+
+
+# Single hashed lookup per config line instead of a chain of startswith
+# probes (numeric fields are plain ints, so no regex needed either)
+CONFIG_HANDLERS = {
+    'HEADLESS': lambda config, val: config.update(headless='true' in val.lower()),
+    'MAX_CONCURRENT': lambda config, val: config.update(max_concurrent=int(val)),
+    'REVIEW_SHEET': lambda config, val: config.update(review_sheet=val),
+    'GOOGLE_SHEET_ID': lambda config, val: config.update(google_sheet_id=val),
+    'GOOGLE_CREDENTIALS': lambda config, val: config.update(google_credentials=val),
+}
+
+
+def _parse_config(config_file):
+    """Parse accounts.config line by line"""
     config = {
         "accounts": [],
         "headless": True,
@@ -49,203 +117,217 @@ def load_config(config_file="accounts.config"):
     in_accounts = False
     for line in content.split('\n'):
         line = line.strip()
-        
-        if line.startswith('ACCOUNTS:'):
-            in_accounts = True
-            continue
-        
-        if line.startswith('HEADLESS:'):
-            config['headless'] = 'true' in line.lower()
-            in_accounts = False
-            continue
-            
-        if line.startswith('MAX_CONCURRENT:'):
-            match = re.search(r'(\d+)', line)
-            if match:
-                config['max_concurrent'] = int(match.group(1))
-            in_accounts = False
-            continue
-            
-        if line.startswith('REVIEW_SHEET:'):
-            config['review_sheet'] = line.split(':', 1)[1].strip()
-            in_accounts = False
-            continue
-        
-        if line.startswith('GOOGLE_SHEET_ID:'):
-            config['google_sheet_id'] = line.split(':', 1)[1].strip()
-            in_accounts = False
-            continue
-            
-        if line.startswith('GOOGLE_CREDENTIALS:'):
-            config['google_credentials'] = line.split(':', 1)[1].strip()
-            in_accounts = False
-            continue
-        
+
+        key, sep, val = line.partition(':')
+        if sep:
+            key = key.strip().upper()
+            if key == 'ACCOUNTS':
+                in_accounts = True
+                continue
+            handler = CONFIG_HANDLERS.get(key)
+            if handler:
+                handler(config, val.strip())
+                in_accounts = False
+                continue
+
         # Parse account line
         if in_accounts and ',' in line and not line.startswith('#'):
-            parts = line.split(',', 1)
-            if len(parts) == 2:
-                email, password = parts[0].strip(), parts[1].strip()
-                if email and password:
-                    config['accounts'].append({'email': email, 'password': password})
-    
+            email, _, password = line.partition(',')
+            email, password = email.strip(), password.strip()
+            if email and password:
+                config['accounts'].append({'email': email, 'password': password})
+
     return config
 
 
-async def run_account_batch(email, password, data_manager, headless, max_tasks, account_label, rotation=1):
+BROWSER_ARGS = ['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
+
+
+async def get_or_launch_context(playwright, contexts, email, headless):
+    """
+    Reuse the per-account persistent context across rotations, relaunching
+    only if its browser died.
+
+    The on-disk profile keeps cookies, HTTP cache and service workers, so
+    the review page's subresources revalidate instead of re-downloading
+    every batch.
+    """
+    context = contexts.get(email)
+    if context is not None:
+        browser = context.browser
+        if browser is not None and not browser.is_connected():
+            try:
+                await context.close()
+            except Exception:
+                pass
+            contexts.pop(email, None)
+            context = None
+
+    if context is None:
+        user_data_dir = os.path.join('.cache', f'profile_{hashlib.sha1(email.encode()).hexdigest()}')
+        os.makedirs(user_data_dir, exist_ok=True)
+        # A crashed Chromium can leave its profile lock behind
+        Path(user_data_dir, 'SingletonLock').unlink(missing_ok=True)
+        context = await playwright.chromium.launch_persistent_context(
+            user_data_dir, headless=headless, args=BROWSER_ARGS
+        )
+        contexts[email] = context
+    return context
+
+
+async def run_account_batch(email, password, data_manager, context, max_tasks, account_label, sem, rotation=1):
     """Run a batch of tasks for one account, returns number of completed tasks"""
-    print(f"\n{'='*50}")
-    print(f"🚀 [{account_label}] Starting: {email} (max {max_tasks} tasks)")
-    print(f"{'='*50}")
-    
-    # Get monitor instance
-    monitor = AccountMonitor.get_instance()
-    monitor.start_account(email, rotation=rotation, max_tasks=max_tasks)
+    # Concurrency gate + small random jitter: all pair tasks are created
+    # at once and the semaphore bounds how many actually run
+    async with sem:
+        await asyncio.sleep(random.uniform(0, 5))
+        if log.isEnabledFor(logging.INFO):
+            log.info("\n%s\n🚀 [%s] Starting: %s (max %d tasks)\n%s",
+                     '=' * 50, account_label, email, max_tasks, '=' * 50)
     
-    task_logger = TaskLogger("completed_tasks.xlsx", user_name=email)
-    completed = 0
+        # Get monitor instance
+        monitor = AccountMonitor.get_instance()
+        monitor.start_account(email, rotation=rotation, max_tasks=max_tasks)
     
-    from playwright.async_api import async_playwright
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=headless,
-                args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-            )
-            context = await browser.new_context()
+        task_logger = TaskLogger("completed_tasks.xlsx", user_name=email)
+        completed = 0
+
+        try:
+            # The persistent context (with its disk profile) is launched once
+            # per account in run_rotation; each batch only opens a page. The
+            # profile's cookies make bot.login() a no-op after the first run.
             page = await context.new_page()
-            
-            bot = SnorkelBot(page)
-            
             try:
-                await bot.login(email, password)
-                has_task_id = await bot.navigate_to_review()
-                
-                # Handle BLANK TASK from the very start (no Task ID when page loaded)
-                if has_task_id is False:
-                    print(f"[{email}] ⚠️ BLANK TASK from start - Auto REJECT")
-                    decision = {
-                        "action": "REJECT",
-                        "rejection_notes": "No Task ID Present.",
-                        "notes": "No Task ID Present."
-                    }
-                    await bot.process_task(decision)
-                    uid = await bot.get_uid()
-                    task_logger.log_task(
-                        task_id="BLANK_TASK",
-                        uid=uid,
-                        decision_from_sheet="",
-                        status_platform="Reject",
-                        notes="No Task ID Present."
-                    )
-                    completed += 1
-                    monitor.update_progress(email, completed)
-                    print(f"[{email}] ✓ BLANK TASK rejected from start")
+                bot = SnorkelBot(page)
+
+                try:
+                    await bot.login(email, password)
+                    has_task_id = await bot.navigate_to_review()
                 
-                while completed < max_tasks:
-                    print(f"\n[{email}] --- Task #{completed + 1}/{max_tasks} ---")
-                    await page.wait_for_timeout(2000)
-                    
-                    task_id = await bot.get_task_id()
-                    if not task_id:
-                        print(f"[{email}] No more tasks available.")
-                        break
-                    
-                    uid = await bot.get_uid()
-                    
-                    # Handle BLANK TASK - auto reject
-                    if task_id == "BLANK_TASK":
-                        print(f"[{email}] ⚠️ BLANK TASK detected - Auto REJECT")
-                        decision = {
-                            "action": "REJECT",
-                            "rejection_notes": "No Task ID Present.",
-                            "notes": "No Task ID Present."
-                        }
-                        await bot.process_task(decision)
-                        task_logger.log_task(
+                    # Handle BLANK TASK from the very start (no Task ID when page loaded)
+                    if has_task_id is False:
+                        log.info("[%s] ⚠️ BLANK TASK from start - Auto REJECT", email)
+                        await bot.process_task(BLANK_DECISION)
+                        task_logger.log_task_buffered(
                             task_id="BLANK_TASK",
-                            uid=uid,
+                            uid="",  # no UID is meaningful on a blank task
                             decision_from_sheet="",
                             status_platform="Reject",
                             notes="No Task ID Present."
                         )
                         completed += 1
                         monitor.update_progress(email, completed)
-                        print(f"[{email}] ✓ BLANK TASK rejected #{completed}/{max_tasks}")
-                        await asyncio.sleep(1)
-                        continue
-                    
-                    print(f"[{email}] Task ID: {task_id}")
+                        log.info("[%s] ✓ BLANK TASK rejected from start", email)
+                
+                    while completed < max_tasks:
+                        log.info("\n[%s] --- Task #%d/%d ---", email, completed + 1, max_tasks)
+                        await bot.wait_task_ready()
                     
-                    decision, row_data = data_manager.get_decision(task_id)
-                    print(f"[{email}] Decision: {decision['action']}")
+                        task_id = await bot.get_task_id()
+                        if not task_id:
+                            log.info("[%s] No more tasks available.", email)
+                            break
                     
-                    await bot.process_task(decision)
+                        # Handle BLANK TASK - auto reject (skip the UID DOM
+                        # query: no UID is meaningful on a blank task)
+                        if task_id == "BLANK_TASK":
+                            log.info("[%s] ⚠️ BLANK TASK detected - Auto REJECT", email)
+                            await bot.process_task(BLANK_DECISION)
+                            task_logger.log_task_buffered(
+                                task_id="BLANK_TASK",
+                                uid="",
+                                decision_from_sheet="",
+                                status_platform="Reject",
+                                notes="No Task ID Present."
+                            )
+                            completed += 1
+                            monitor.update_progress(email, completed)
+                            log.info("[%s] ✓ BLANK TASK rejected #%d/%d", email, completed, max_tasks)
+                            continue
                     
-                    decision_from_sheet = row_data.get('decision', '') if row_data else ''
-                    status_platform = ACTION_TO_STATUS.get(decision['action'], 'Unsure')
-                    task_logger.log_task(
-                        task_id=task_id,
-                        uid=uid,
-                        decision_from_sheet=decision_from_sheet,
-                        status_platform=status_platform,
-                        notes=decision.get('notes', '')[:200]
-                    )
+                        log.info("[%s] Task ID: %s", email, task_id)
+
+                        uid = await bot.get_uid()
+                        decision, row_data = await data_manager.get_decision_async(task_id)
+                        action = decision['action']
+                        notes = decision.get('notes', '')
+                        log.info("[%s] Decision: %s", email, action)
+
+                        # Pipeline prefetch: pay any due sheet refresh while the
+                        # slow Playwright submit runs, not on the next lookup
+                        refresh_task = asyncio.create_task(data_manager.prefetch_refresh())
+                        await bot.process_task(decision)
+                        await refresh_task
+
+                        decision_from_sheet = row_data.get('decision', '') if row_data else ''
+                        status_platform = ACTION_TO_STATUS.get(action, 'Unsure')
+                        task_logger.log_task_buffered(
+                            task_id=task_id,
+                            uid=uid,
+                            decision_from_sheet=decision_from_sheet,
+                            status_platform=status_platform,
+                            notes=notes[:MAX_NOTES]
+                        )
                     
-                    completed += 1
-                    monitor.update_progress(email, completed)
-                    print(f"[{email}] ✓ Task #{completed}/{max_tasks} completed")
-                    await asyncio.sleep(1)
-                
-                # Mark as completed successfully
-                monitor.mark_completed(email, completed)
+                        completed += 1
+                        monitor.update_progress(email, completed)
+                        log.info("[%s] ✓ Task #%d/%d completed", email, completed, max_tasks)
+                        if completed % 25 == 0:
+                            task_logger.flush()  # safety checkpoint
+
+                    # Mark as completed successfully
+                    monitor.mark_completed(email, completed)
                     
-            except Exception as e:
-                print(f"[{email}] Error: {e}")
-                import traceback
-                traceback.print_exc()
-                monitor.mark_crashed(email, str(e))
+                except Exception as e:
+                    log.error("[%s] Error: %s", email, e)
+                    import traceback
+                    traceback.print_exc()
+                    monitor.mark_crashed(email, str(e))
                 
+                finally:
+                    task_logger.flush()
+                    log.info("\n[%s] === Batch Complete: %d tasks ===", email, completed)
             finally:
-                print(f"\n[{email}] === Batch Complete: {completed} tasks ===")
-                await browser.close()
-    
-    except Exception as e:
-        print(f"[{email}] Browser launch error: {e}")
-        monitor.mark_crashed(email, str(e))
+                await page.close()
+
+        except Exception as e:
+            log.error("[%s] Browser context error: %s", email, e)
+            monitor.mark_crashed(email, str(e))
     
-    return completed
+        return completed
 
 
-async def run_pair(pair, data_manager, headless, tasks_per_account, pair_index, rotation=1):
+async def run_pair(pair, data_manager, playwright, contexts, headless, sem, tasks_per_account, pair_index, rotation=1):
     """Run a pair of accounts concurrently"""
     print(f"\n{'#'*60}")
     print(f"# PAIR {pair_index}: {[acc['email'] for acc in pair]}")
     print(f"# Each account will do {tasks_per_account} tasks")
     print(f"{'#'*60}")
-    
-    tasks = []
-    for i, acc in enumerate(pair):
-        # Stagger start by 5 seconds
-        await asyncio.sleep(i * 5)
-        task = asyncio.create_task(
+
+    # All tasks start at once; the semaphore (plus jitter inside the batch)
+    # bounds concurrency without serializing the coordinator
+    tasks = [
+        asyncio.create_task(
             run_account_batch(
-                acc['email'], acc['password'], 
-                data_manager, headless, 
+                acc['email'], acc['password'],
+                data_manager,
+                await get_or_launch_context(playwright, contexts, acc['email'], headless),
                 tasks_per_account,
                 f"Pair{pair_index}-Acc{i+1}",
+                sem,
                 rotation=rotation
             )
         )
-        tasks.append(task)
-    
+        for i, acc in enumerate(pair)
+    ]
+
     results = await asyncio.gather(*tasks)
     total = sum(results)
     print(f"\n✅ Pair {pair_index} completed: {total} total tasks")
     return total
 
 
-async def restart_crashed_accounts(accounts, data_manager, headless, rotation):
+async def restart_crashed_accounts(accounts_by_email, data_manager, playwright, contexts, headless, sem, rotation):
     """Check for crashed accounts and restart them"""
     monitor = AccountMonitor.get_instance()
     crashed = monitor.get_crashed_accounts()
@@ -257,44 +339,63 @@ async def restart_crashed_accounts(accounts, data_manager, headless, rotation):
     print(f"! RESTARTING {len(crashed)} CRASHED ACCOUNT(S)")
     print(f"{'!'*60}")
     
-    total_restarted = 0
+    coros = []
     for acc_info in crashed:
         email = acc_info['email']
-        
+
         # Check if should restart
         if not monitor.should_restart(email, MAX_RESTART_ATTEMPTS):
             continue
-        
-        # Find password from accounts list
-        password = None
-        for acc in accounts:
-            if acc['email'] == email:
-                password = acc['password']
-                break
-        
+
+        # O(1) password lookup from the map built once in run_rotation
+        password = accounts_by_email.get(email)
+
         if not password:
             print(f"⚠️ Password not found for {email}, skipping restart")
             continue
-        
+
         # Calculate remaining tasks
         remaining = monitor.get_remaining_tasks(email)
         if remaining <= 0:
             print(f"⚠️ {email} has no remaining tasks, skipping restart")
             continue
-        
+
         monitor.mark_restarting(email)
-        
+
         print(f"\n🔄 Restarting {email} with {remaining} remaining tasks...")
-        completed = await run_account_batch(
+        # A crash may have taken the browser down; relaunch only this one
+        context = await get_or_launch_context(playwright, contexts, email, headless)
+        coros.append(run_account_batch(
             email, password,
-            data_manager, headless,
+            data_manager, context,
             remaining,
             f"Restart-{acc_info['restart_count']+1}",
+            sem,
             rotation=rotation
-        )
-        total_restarted += completed
-    
-    return total_restarted
+        ))
+
+    if not coros:
+        return 0
+
+    # Fan restarts out together (still capped by the semaphore): recovery
+    # takes as long as the slowest restart, not the sum of them
+    results = await asyncio.gather(*coros, return_exceptions=True)
+    for r in results:
+        if isinstance(r, Exception):
+            print(f"⚠️ Restart failed: {r}")
+    return sum(r for r in results if isinstance(r, int))
+
+
+def _is_exhausted(monitor, email):
+    """
+    True when the account's last batch ended with 0 completed tasks: its
+    platform queue is empty, so don't pay a browser launch next rotation
+    just to rediscover that.
+    """
+    data = monitor.accounts.get(email)
+    if not data:
+        return False  # never run yet - it still has its full quota
+    return data.get('status') == 'completed' and data.get('completed_tasks', 0) == 0
 
 
 async def run_rotation(config):
@@ -326,6 +427,10 @@ async def run_rotation(config):
     
     # Create pairs (2 accounts per pair)
     pairs = [accounts[i:i+2] for i in range(0, len(accounts), 2)]
+
+    # Built once for the recovery path: crashed-account restarts look
+    # passwords up by email instead of rescanning the accounts list
+    accounts_by_email = {acc['email']: acc['password'] for acc in accounts}
     
     print(f"\n📋 Rotation Config:")
     print(f"   - Total accounts: {len(accounts)}")
@@ -337,40 +442,67 @@ async def run_rotation(config):
     # Run rotation loop
     rotation = 0
     max_rotations = 100  # Safety limit
-    
-    while rotation < max_rotations:
-        rotation += 1
-        print(f"\n{'='*60}")
-        print(f"   ROTATION #{rotation}")
-        print(f"{'='*60}")
-        
-        total_tasks = 0
-        for pair_idx, pair in enumerate(pairs, 1):
-            tasks_done = await run_pair(pair, data_manager, headless, TASKS_PER_ROTATION, pair_idx, rotation=rotation)
-            total_tasks += tasks_done
-            
-            if tasks_done == 0:
-                print(f"⚠️ Pair {pair_idx} completed 0 tasks - may be no more tasks available")
-        
-        # Check and restart crashed accounts
-        restarted_tasks = await restart_crashed_accounts(accounts, data_manager, headless, rotation)
-        total_tasks += restarted_tasks
-        
-        # Print status summary
-        monitor.print_status()
-        
-        print(f"\n🔄 Rotation #{rotation} complete: {total_tasks} total tasks")
-        
-        if total_tasks == 0:
-            print("🛑 No tasks completed in this rotation. Stopping.")
-            break
-        
-        # Brief pause between rotations
-        print("⏳ Pausing 10s before next rotation...")
-        await asyncio.sleep(10)
-    
+
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        # One persistent Chromium context per account, kept alive across
+        # rotations: batches only open a page, and the on-disk profile
+        # keeps cookies and HTTP cache warm between runs
+        contexts = {}
+        sem = asyncio.Semaphore(config.get('max_concurrent', 2))
+        try:
+            while rotation < max_rotations:
+                rotation += 1
+
+                # Everyone's queue came back empty - no point rotating again
+                if all(_is_exhausted(monitor, acc['email']) for acc in accounts):
+                    print("🛑 All accounts exhausted - stopping rotations.")
+                    break
+
+                print(f"\n{'='*60}")
+                print(f"   ROTATION #{rotation}")
+                print(f"{'='*60}")
+
+                total_tasks = 0
+                for pair_idx, pair in enumerate(pairs, 1):
+                    active = [acc for acc in pair if not _is_exhausted(monitor, acc['email'])]
+                    if not active:
+                        print(f"⏭️ Pair {pair_idx} skipped - no tasks left for its accounts")
+                        continue
+                    tasks_done = await run_pair(active, data_manager, p, contexts, headless, sem, TASKS_PER_ROTATION, pair_idx, rotation=rotation)
+                    total_tasks += tasks_done
+
+                    if tasks_done == 0:
+                        print(f"⚠️ Pair {pair_idx} completed 0 tasks - may be no more tasks available")
+
+                # Check and restart crashed accounts
+                restarted_tasks = await restart_crashed_accounts(accounts_by_email, data_manager, p, contexts, headless, sem, rotation)
+                total_tasks += restarted_tasks
+
+                # Print status summary
+                monitor.print_status()
+
+                print(f"\n🔄 Rotation #{rotation} complete: {total_tasks} total tasks")
+
+                if total_tasks == 0:
+                    print("🛑 No tasks completed in this rotation. Stopping.")
+                    break
+
+                # Brief pause between rotations
+                print("⏳ Pausing 10s before next rotation...")
+                await asyncio.sleep(10)
+        finally:
+            for context in contexts.values():
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+
     # Final status
     monitor.print_status()
+
+    # One-time CSV -> xlsx conversion now that the hot path only appends
+    TaskLogger("completed_tasks.xlsx").finalize()
     print("\n🎉 All rotations completed!")
 
 
@@ -5,17 +5,28 @@ Multi-Account Runner with Browser Watchdog
 Usage:
     python run_watchdog.py
 """
+from __future__ import annotations
+
 import asyncio
+import functools
+import itertools
+import json
 import os
 import re
-from collections import deque
-from typing import Dict, Optional
+import shutil
+import traceback
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Optional
+
+from playwright.async_api import async_playwright
 
-from playwright.async_api import Browser, BrowserContext, Page, async_playwright
+if TYPE_CHECKING:
+    from playwright.async_api import Browser
 
-import config as cfg
+from config import CONFIG as cfg
 from src.account_monitor import AccountMonitor
 from src.browser_watchdog import BrowserWatchdog
+from src.context_pool import ContextPool
 from src.data_manager import DataManager
 from src.kpi_manager import KPIManager
 from src.logger_utils import ColoredLogger as log
@@ -33,6 +44,66 @@ ACTION_TO_STATUS = {
 }
 
 
+def _browser_args():
+    """
+    Chromium launch args. --disable-dev-shm-usage redirects shared memory
+    to /tmp (disk I/O per session), so only add it when /dev/shm is
+    actually too small to hold Chromium's shm segments.
+    """
+    args = ['--no-sandbox', '--disable-setuid-sandbox']
+    try:
+        shm_mb = shutil.disk_usage('/dev/shm').total // (1024 * 1024)
+    except OSError:
+        shm_mb = 0  # no /dev/shm on this host - take the safe fallback
+    if shm_mb < cfg.MIN_SHM_MB:
+        args.append('--disable-dev-shm-usage')
+    return args
+
+
+BROWSER_ARGS = _browser_args()
+
+# Placeholder used to atomically reserve a running_tasks slot before the
+# account task object exists (dict ops are atomic on the event loop)
+_SPAWN_PENDING = object()
+
+
+@dataclass(slots=True)
+class _TaskRecord:
+    """Per-task derived fields, computed once and shared by both log sinks"""
+    status_platform: str
+    notes: str
+    decision_from_sheet: str
+    scores: Optional[dict]
+
+
+def _prepare_record(decision: dict, row_data) -> _TaskRecord:
+    """Derive the logging fields for one processed task in a single pass"""
+    if row_data is None and decision['action'] == 'UNSURE':
+        # Task ID not found in Evals
+        decision_from_sheet = 'No Task ID in the Evals'
+    else:
+        decision_from_sheet = row_data.get('decision', '') if row_data else ''
+
+    scores = None
+    if row_data:
+        scores = {
+            'C': row_data.get('overall_score', 0),
+            'E': row_data.get('task_correctness_score', 0),
+            'I': row_data.get('response_accuracy_score', 0)
+        }
+
+    notes = decision.get('notes', '')
+    if len(notes) > 200:
+        notes = notes[:200]
+
+    return _TaskRecord(
+        status_platform=ACTION_TO_STATUS.get(decision['action'], 'Unsure'),
+        notes=notes,
+        decision_from_sheet=decision_from_sheet,
+        scores=scores
+    )
+
+
 class WatchdogRunner:
     """Runner with continuous browser monitoring"""
     
@@ -40,9 +111,14 @@ class WatchdogRunner:
         self.config = config
         self.accounts = config['accounts']
         self.headless = config['headless']
-        # Dual-queue system: incomplete accounts have absolute priority
-        self.incomplete_queue = deque()  # Priority 1: Accounts that crashed with incomplete quota
-        self.normal_queue = deque()      # Priority 2: Normal rotation queue
+        # Priority queue: incomplete accounts (priority 0) always spawn
+        # before normal rotation (priority 1). The set index gives O(1)
+        # membership checks instead of scanning a deque.
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()  # (priority, seq, email)
+        self._enqueued: set = set()
+        self._seq = itertools.count()  # FIFO tie-break within one priority
+        self._incomplete_count = 0
+        self._normal_count = 0
         self.running_tasks: Dict[str, asyncio.Task] = {}  # email -> task
         self.passwords: Dict[str, str] = {}  # email -> password
         self.account_kpis: Dict[str, int] = {}  # email -> KPI target
@@ -52,8 +128,13 @@ class WatchdogRunner:
         self.kpi_manager: Optional[KPIManager] = None
         self.work_hours: Optional[WorkHoursScheduler] = None
         self.playwright = None
+        self.browser: Optional[Browser] = None  # one shared Chromium, contexts per account
+        self.context_pool: Optional[ContextPool] = None
         self._running = False
-        self._lock = asyncio.Lock()
+        # Wakes the run loop as soon as a crash/spawn/task-exit happens
+        # instead of it polling every few seconds
+        self._state_changed = asyncio.Event()
+        self._periodic_tasks: list = []  # status reporter + work-hours watcher
         self.rotation = 1
         
     async def initialize(self):
@@ -79,10 +160,10 @@ class WatchdogRunner:
             enabled=cfg.ENABLE_WORK_HOURS
         )
         
-        # Only add accounts to normal_queue if they haven't met KPI
+        # Only queue accounts that haven't met KPI
         for email in self.account_kpis.keys():
             if not self.kpi_manager.has_met_kpi(email):
-                self.normal_queue.append(email)
+                self._enqueue(email)
             else:
                 log.log(email, f"✅ KPI already met ({self.kpi_manager.get_progress(email)}/{self.kpi_manager.get_kpi(email)}), skipping", 'SUCCESS')
         
@@ -116,10 +197,34 @@ class WatchdogRunner:
         
         # Start playwright
         self.playwright = await async_playwright().start()
-        
+
+        # One browser process for all accounts: each spawn only creates an
+        # isolated BrowserContext (own cookies/storage) instead of paying a
+        # multi-second Chromium cold start and a full set of renderer processes
+        self.browser = await self.playwright.chromium.launch(
+            headless=self.headless,
+            args=BROWSER_ARGS
+        )
+
+        # Pre-warmed contexts: spawning an account becomes a pool acquire
+        # instead of waiting on context creation during crash recovery
+        self.context_pool = ContextPool(
+            self._ensure_browser,
+            size=cfg.WATCHDOG_MIN_BROWSERS + 2,
+            max_uses=20
+        )
+        await self.context_pool.start()
+
+        # Periodic housekeeping runs on its own cadence, keeping run()
+        # purely event-driven
+        self._periodic_tasks = [
+            asyncio.create_task(self._status_reporter()),
+            asyncio.create_task(self._work_hours_watcher()),
+        ]
+
         log.log_separator("Watchdog Runner Config")
         log.log_status(f"Total accounts: {len(self.accounts)}", 'INFO')
-        log.log_status(f"Accounts needing work: {len(self.normal_queue)}", 'INFO')
+        log.log_status(f"Accounts needing work: {self._normal_count}", 'INFO')
         log.log_status(f"Min browsers: {cfg.WATCHDOG_MIN_BROWSERS}", 'INFO')
         log.log_status(f"Check interval: {cfg.WATCHDOG_CHECK_INTERVAL}s", 'INFO')
         log.log_status(f"Headless: {self.headless}", 'INFO')
@@ -127,10 +232,60 @@ class WatchdogRunner:
         log.log_separator("KPI Overview")
         self.kpi_manager.print_status()
     
+    async def _ensure_browser(self) -> Browser:
+        """Return the shared browser, relaunching it if it died"""
+        if self.browser is None or not self.browser.is_connected():
+            log.log_status("Shared browser lost - relaunching", 'WARNING')
+            if self.browser is not None:
+                try:
+                    await self.browser.close()
+                except Exception:
+                    pass
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=BROWSER_ARGS
+            )
+        return self.browser
+
+    def _state_path(self, email: str) -> str:
+        """Per-account storage_state snapshot path"""
+        return os.path.join('.cache', f'state_{email}.json')
+
+    def _enqueue(self, email: str, incomplete: bool = False) -> bool:
+        """
+        Queue an account for spawning (O(1), deduplicated by the set index).
+        Incomplete accounts get priority 0 so they always spawn first.
+        Returns False if the account was already queued.
+        """
+        if email in self._enqueued:
+            return False
+        self._enqueued.add(email)
+        if incomplete:
+            self._incomplete_count += 1
+        else:
+            self._normal_count += 1
+        self._queue.put_nowait((0 if incomplete else 1, next(self._seq), email))
+        return True
+
+    def _dequeue(self):
+        """Pop the highest-priority queued account → (email, queue_type) or (None, None)"""
+        try:
+            prio, _, email = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None, None
+        self._enqueued.discard(email)
+        if prio == 0:
+            self._incomplete_count -= 1
+            return email, "INCOMPLETE"
+        self._normal_count -= 1
+        return email, "NORMAL"
+
     async def _on_crash(self, email: str):
         """Callback when browser crash detected"""
+        self._state_changed.set()
         log.log_status(f"💥 CRASH DETECTED: {email}", 'ERROR')
-        self.monitor.mark_browser_lost(email, "Watchdog detected browser crash")
+        # mark_* writes the status JSON; keep that off the event loop
+        await asyncio.to_thread(self.monitor.mark_browser_lost, email, "Watchdog detected browser crash")
         
         # Remove from running tasks
         if email in self.running_tasks:
@@ -144,7 +299,7 @@ class WatchdogRunner:
         
         if remaining > 0 and self.monitor.should_restart(email, cfg.WATCHDOG_MAX_RESTARTS):
             # Add to INCOMPLETE queue (highest priority)
-            self.incomplete_queue.appendleft(email)
+            self._enqueue(email, incomplete=True)
             log.log(email, f"🔴 INCOMPLETE: {checkpoint}/{checkpoint+remaining} tasks → Added to INCOMPLETE queue", 'ERROR')
             log.log_incomplete_status(self.monitor.get_incomplete_accounts())
         else:
@@ -154,10 +309,10 @@ class WatchdogRunner:
                 log.log(email, f"⚠️ Max restarts exceeded, skipping", 'WARNING')
     
     async def _on_need_spawn(self, count: int):
-        """Callback when more browsers needed"""
+        """Callback when more browsers needed - spawns run in parallel"""
+        self._state_changed.set()
         log.log_status(f"Need to spawn {count} browser(s)", 'INFO')
-        for _ in range(count):
-            await self._spawn_next_browser()
+        await asyncio.gather(*(self._spawn_next_browser() for _ in range(count)))
     
     async def _spawn_next_browser(self):
         """Spawn browser for next available account - INCOMPLETE queue has absolute priority"""
@@ -166,47 +321,54 @@ class WatchdogRunner:
             log.log_status(f"⏸️  Cannot spawn browser - outside work hours ({self.work_hours.get_status_message()})", 'WARNING')
             return
         
-        async with self._lock:
-            # Priority 1: Incomplete accounts MUST complete first
-            if self.incomplete_queue:
-                email = self.incomplete_queue.popleft()
-                queue_type = "INCOMPLETE"
-                log.log_queue_status(len(self.incomplete_queue), len(self.normal_queue))
-            # Priority 2: Normal rotation
-            elif self.normal_queue:
-                email = self.normal_queue.popleft()
-                queue_type = "NORMAL"
+        # Incomplete accounts always come out first (priority 0)
+        email, queue_type = self._dequeue()
+        if email is None:
+            log.log_status("⚠️ No accounts available in any queue", 'WARNING')
+            return
+        if queue_type == "INCOMPLETE":
+            log.log_queue_status(self._incomplete_count, self._normal_count)
+
+        password = self.passwords.get(email)
+
+        if not password:
+            log.log(email, f"⚠️ No password found", 'ERROR')
+            return
+
+        # Atomically reserve the slot; no lock needed since concurrent
+        # spawns only race on this dict entry
+        existing = self.running_tasks.setdefault(email, _SPAWN_PENDING)
+        if existing is not _SPAWN_PENDING:
+            if isinstance(existing, asyncio.Task) and existing.done():
+                self.running_tasks[email] = _SPAWN_PENDING  # stale entry, take it over
             else:
-                log.log_status("⚠️ No accounts available in any queue", 'WARNING')
-                return
-            
-            password = self.passwords.get(email)
-            
-            if not password:
-                log.log(email, f"⚠️ No password found", 'ERROR')
-                return
-            
-            # Check if already running
-            if email in self.running_tasks and not self.running_tasks[email].done():
                 log.log(email, f"⚠️ Already running, re-queuing", 'WARNING')
-                if queue_type == "INCOMPLETE":
-                    self.incomplete_queue.append(email)
-                else:
-                    self.normal_queue.append(email)
+                self._enqueue(email, incomplete=(queue_type == "INCOMPLETE"))
                 return
-            
-            # Spawn new task
-            task = asyncio.create_task(
-                self._run_account(email, password)
-            )
-            self.running_tasks[email] = task
-            
-            checkpoint = self.monitor.get_checkpoint(email)
-            if checkpoint > 0:
-                log.log(email, f"🔄 Spawning from [{queue_type}] queue (checkpoint: {checkpoint} tasks)", 'WARNING')
-            else:
-                log.log(email, f"🚀 Spawning from [{queue_type}] queue", 'INFO')
+
+        # Spawn new task
+        task = asyncio.create_task(
+            self._run_account(email, password)
+        )
+        task.add_done_callback(functools.partial(self._on_task_done, email))
+        self.running_tasks[email] = task
+
+        checkpoint = self.monitor.get_checkpoint(email)
+        if checkpoint > 0:
+            log.log(email, f"🔄 Spawning from [{queue_type}] queue (checkpoint: {checkpoint} tasks)", 'WARNING')
+        else:
+            log.log(email, f"🚀 Spawning from [{queue_type}] queue", 'INFO')
     
+    def _on_task_done(self, email: str, task: asyncio.Task):
+        """Done-callback: drop the finished task, log failures, wake the run loop"""
+        if self.running_tasks.get(email) is task:
+            del self.running_tasks[email]
+        if not task.cancelled():
+            exc = task.exception()
+            if exc is not None:
+                log.log_status(f"Task for {email} failed: {exc}", 'ERROR')
+        self._state_changed.set()
+
     async def _run_account(self, email: str, password: str):
         """Run tasks for one account with watchdog integration - KPI-based"""
         # Get KPI and current progress
@@ -224,31 +386,43 @@ class WatchdogRunner:
         log.log_separator(f"🚀 STARTING: {email}")
         log.log(email, f"KPI: {current_progress}/{kpi_target} | This session: {max_tasks} tasks | Rotation #{self.rotation}", 'INFO')
         
-        self.monitor.start_account(email, rotation=self.rotation, max_tasks=max_tasks)
+        # start_account writes the status JSON; keep that off the event loop
+        await asyncio.to_thread(self.monitor.start_account, email, rotation=self.rotation, max_tasks=max_tasks)
         task_logger = TaskLogger("completed_tasks.xlsx", user_name=email)
         completed = 0
         
-        browser = None
         context = None
         page = None
-        
+        crashed = False
+
         try:
-            # Launch browser
-            browser = await self.playwright.chromium.launch(
-                headless=self.headless,
-                args=['--no-sandbox', '--disable-setuid-sandbox', '--disable-dev-shm-usage']
-            )
-            context = await browser.new_context()
+            # Warm context from the pool; seed this account's saved session
+            # cookies so login is usually a no-op
+            context = await self.context_pool.acquire()
+            state_path = self._state_path(email)
+            try:
+                if os.path.exists(state_path):
+                    with open(state_path, 'r') as f:
+                        cookies = json.load(f).get('cookies', [])
+                    if cookies:
+                        await context.add_cookies(cookies)
+            except Exception:
+                pass  # fall back to a fresh login
             page = await context.new_page()
-            
+
             # Register with watchdog
-            await self.watchdog.register_browser(email, page, context, browser)
-            
+            await self.watchdog.register_browser(email, page, context, self.browser)
+
             bot = SnorkelBot(page)
-            
+
             try:
                 log.log(email, "Logging in...", 'INFO')
                 await bot.login(email, password)
+                try:
+                    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+                    await context.storage_state(path=state_path)
+                except Exception:
+                    pass  # session snapshot is best-effort
                 has_task_id = await bot.navigate_to_review()
                 
                 # Handle BLANK TASK from the very start
@@ -262,7 +436,7 @@ class WatchdogRunner:
                         "notes": "No Task ID Present."
                     }
                     await bot.process_task(decision)
-                    task_logger.log_task(
+                    task_logger.log_task_buffered(
                         task_id="BLANK_TASK",
                         uid=uid,
                         decision_from_sheet="Blank Task",
@@ -271,7 +445,8 @@ class WatchdogRunner:
                     )
                     completed += 1
                     self.monitor.update_progress(email, completed)
-                    await self.watchdog.update_task_count(email, completed)
+                    self.kpi_manager.increment_progress(email)
+                    self.watchdog.update_task_count(email, completed)
                     log.log_task(email, completed, max_tasks, "BLANK_TASK", "REJECT")
                 
                 while completed < max_tasks:
@@ -280,7 +455,9 @@ class WatchdogRunner:
                         log.log(email, "Browser unhealthy, stopping", 'ERROR')
                         break
                     
-                    await page.wait_for_timeout(2000)
+                    # Event-driven: returns as soon as the next task's panel
+                    # is attached instead of always paying a fixed 2s
+                    await bot.wait_task_ready()
                     
                     task_id = await bot.get_task_id()
                     if not task_id:
@@ -297,7 +474,7 @@ class WatchdogRunner:
                             "notes": "No Task ID Present."
                         }
                         await bot.process_task(decision)
-                        task_logger.log_task(
+                        task_logger.log_task_buffered(
                             task_id="BLANK_TASK",
                             uid=uid,
                             decision_from_sheet="Blank Task",
@@ -306,88 +483,91 @@ class WatchdogRunner:
                         )
                         completed += 1
                         self.monitor.update_progress(email, completed)
-                        await self.watchdog.update_task_count(email, completed)
+                        self.kpi_manager.increment_progress(email)
+                        self.watchdog.update_task_count(email, completed)
                         log.log_task(email, completed, max_tasks, "BLANK_TASK", "REJECT")
-                        await asyncio.sleep(1)
                         continue
                     
-                    decision, row_data = self.data_manager.get_decision(task_id)
+                    # Off-loop lookup: a due sheet refresh inside get_decision
+                    # would otherwise stall every other account
+                    decision, row_data = await self.data_manager.get_decision_async(task_id)
                     
                     await bot.process_task(decision)
                     
-                    # If row_data is None, it means Task ID not found in Evals
-                    if row_data is None and decision['action'] == 'UNSURE':
-                        decision_from_sheet = 'No Task ID in the Evals'
-                    else:
-                        decision_from_sheet = row_data.get('decision', '') if row_data else ''
-                    
-                    status_platform = ACTION_TO_STATUS.get(decision['action'], 'Unsure')
-                    task_logger.log_task(
+                    record = _prepare_record(decision, row_data)
+                    task_logger.log_task_buffered(
                         task_id=task_id,
                         uid=uid,
-                        decision_from_sheet=decision_from_sheet,
-                        status_platform=status_platform,
-                        notes=decision.get('notes', '')[:200]
+                        decision_from_sheet=record.decision_from_sheet,
+                        status_platform=record.status_platform,
+                        notes=record.notes
                     )
                     
                     completed += 1
                     self.monitor.update_progress(email, completed)
-                    await self.watchdog.update_task_count(email, completed)
+                    self.kpi_manager.increment_progress(email)
+                    self.watchdog.update_task_count(email, completed)
+                    if completed % 20 == 0:
+                        # persist the batch off the event loop, one CSV append
+                        await asyncio.to_thread(task_logger.flush)
                     
-                    # Extract scores for logging
-                    scores = None
-                    if row_data:
-                        scores = {
-                            'C': row_data.get('overall_score', 0),
-                            'E': row_data.get('task_correctness_score', 0),
-                            'I': row_data.get('response_accuracy_score', 0)
-                        }
-                    
-                    log.log_task(email, completed, max_tasks, task_id, decision['action'], scores, decision_from_sheet)
-                    await asyncio.sleep(1)
+                    log.log_task(email, completed, max_tasks, task_id, decision['action'], record.scores, record.decision_from_sheet)
                 
                 # Mark as completed successfully
-                self.monitor.mark_completed(email, completed)
+                await asyncio.to_thread(self.monitor.mark_completed, email, completed)
                 log.log(email, f"Batch complete: {completed}/{max_tasks} tasks", 'SUCCESS')
                 
             except Exception as e:
-                log.log(email, f"Error: {e}", 'ERROR')
-                import traceback
-                traceback.print_exc()
-                self.monitor.mark_crashed(email, str(e))
+                crashed = True
+                log.log(email, f"Error: {e}\n{traceback.format_exc()}", 'ERROR')
+                await asyncio.to_thread(self.monitor.mark_crashed, email, str(e))
                 # Add to INCOMPLETE queue if should restart
                 if self.monitor.should_restart(email, cfg.WATCHDOG_MAX_RESTARTS):
                     remaining = self.monitor.get_remaining_tasks(email)
                     if remaining > 0:
-                        self.monitor.mark_restarting(email)
-                        self.incomplete_queue.appendleft(email)
+                        await asyncio.to_thread(self.monitor.mark_restarting, email)
+                        self._enqueue(email, incomplete=True)
                         log.log(email, f"🔴 Added to INCOMPLETE queue ({remaining} tasks remaining)", 'WARNING')
                 
         except Exception as e:
+            crashed = True
             log.log(email, f"Browser launch error: {e}", 'ERROR')
-            self.monitor.mark_crashed(email, str(e))
+            await asyncio.to_thread(self.monitor.mark_crashed, email, str(e))
             # Add to INCOMPLETE queue if should restart
             if self.monitor.should_restart(email, cfg.WATCHDOG_MAX_RESTARTS):
                 remaining = self.monitor.get_remaining_tasks(email)
                 if remaining > 0:
-                    self.monitor.mark_restarting(email)
-                    self.incomplete_queue.appendleft(email)
+                    await asyncio.to_thread(self.monitor.mark_restarting, email)
+                    self._enqueue(email, incomplete=True)
                     log.log(email, f"🔴 Added to INCOMPLETE queue ({remaining} tasks remaining)", 'WARNING')
             
         finally:
+            # persist any buffered rows before cleanup (off-loop: CSV write)
+            await asyncio.to_thread(task_logger.flush)
+
             # Unregister from watchdog
             await self.watchdog.unregister_browser(email)
-            
-            # Clean up
-            if browser:
+
+            # On a clean exit, refresh the session snapshot so the next
+            # spawn inherits any tokens rotated during this batch
+            if context and not crashed:
+                try:
+                    await context.storage_state(path=self._state_path(email))
+                except Exception:
+                    pass  # session snapshot is best-effort
+
+            # Clean up: close our page, then hand the context back to the
+            # pool (it recycles unhealthy/worn-out ones itself)
+            if page:
                 try:
-                    await browser.close()
+                    await page.close()
                 except Exception:
                     pass
+            if context:
+                await self.context_pool.release(context, healthy=not crashed)
             
-            # Add back to queue based on completion status and KPI
-            # Refresh KPI progress
-            self.kpi_manager.refresh_progress()
+            # Add back to queue based on completion status and KPI.
+            # Progress was incremented per task in memory - no file re-read.
             current_progress = self.kpi_manager.get_progress(email)
             kpi_target = self.kpi_manager.get_kpi(email)
             
@@ -396,19 +576,57 @@ class WatchdogRunner:
                 log.log(email, f"✅ KPI MET! {current_progress}/{kpi_target} tasks completed", 'SUCCESS')
             elif completed >= max_tasks:
                 # Completed this session but KPI not met - add to normal queue
-                self.normal_queue.append(email)
+                self._enqueue(email)
                 remaining = kpi_target - current_progress
                 log.log(email, f"✓ Session complete: {current_progress}/{kpi_target} ({remaining} remaining) - queued to NORMAL", 'SUCCESS')
             elif completed < max_tasks:
                 # Stopped early - check if it's incomplete or just no more tasks
                 remaining = max_tasks - completed
-                if remaining > 0 and email not in self.incomplete_queue and email not in self.normal_queue:
-                    # Add to normal queue (not incomplete because it didn't crash)
-                    self.normal_queue.append(email)
+                if remaining > 0 and self._enqueue(email):
+                    # Normal priority (not incomplete because it didn't crash)
                     log.log(email, f"Stopped at {completed}/{max_tasks} - queued to NORMAL queue", 'WARNING')
         
         return completed
     
+    async def _status_reporter(self):
+        """Print the periodic status line - decoupled from the run loop's wakeups"""
+        while True:
+            await asyncio.sleep(30)
+            active_count = self.watchdog.get_active_count()
+            running_count = len([t for t in self.running_tasks.values() if not t.done()])
+            log.log_status(f"Active: {active_count} | Running: {running_count} | Incomplete: {self._incomplete_count} | Normal: {self._normal_count}")
+            if self._incomplete_count > 0:
+                log.log_incomplete_status(self.monitor.get_incomplete_accounts())
+
+    async def _work_hours_watcher(self):
+        """Pause/resume around work hours - checks on its own 60s cadence"""
+        while True:
+            await asyncio.sleep(60)
+            if self.work_hours.can_run_tasks():
+                continue
+
+            # Outside work hours - pause all browsers
+            log.log_status(self.work_hours.get_status_message(), 'WARNING')
+            for email, task in list(self.running_tasks.items()):
+                if not task.done():
+                    log.log(email, "⏸️  Pausing due to work hours", 'WARNING')
+                    task.cancel()
+                    # Add back to normal queue (set index dedupes)
+                    self._enqueue(email)
+
+            # Sleep straight through to the next work window; cancellation
+            # (shutdown) interrupts this like any other await
+            seconds_until = self.work_hours.get_time_until_work_starts()
+            if seconds_until:
+                hours_until = seconds_until / 3600
+                log.log_status(f"⏰ Sleeping until {cfg.WORK_HOURS_START:02d}:00 ({hours_until:.1f}h)", 'INFO')
+                await asyncio.sleep(seconds_until)
+                if self._running:
+                    log.log_status("✅ Work hours resumed! Restarting browsers...", 'SUCCESS')
+                    await self._on_need_spawn(
+                        min(cfg.WATCHDOG_MIN_BROWSERS, self._normal_count + self._incomplete_count)
+                    )
+
     async def run(self):
         """Main run loop - ensures always min_browsers running"""
         self._running = True
@@ -425,82 +643,27 @@ class WatchdogRunner:
                 await self._spawn_next_browser()
                 await asyncio.sleep(5)  # Stagger start
             
-            # Main loop - keep running until all accounts exhausted
-            last_status_log = 0  # Track last status log time to reduce spam
-            last_work_hours_check = 0  # Track last work hours check
+            # Main loop - event-driven: woken immediately by crash/spawn/
+            # task-exit callbacks, with a 30s timeout as a safety sweep.
+            # Status logging and work-hours handling run as their own
+            # periodic tasks (started in initialize)
             while self._running:
-                await asyncio.sleep(5)
+                try:
+                    await asyncio.wait_for(self._state_changed.wait(), timeout=30)
+                except asyncio.TimeoutError:
+                    pass  # nothing happened - run the safety sweep anyway
+                self._state_changed.clear()
                 
-                # Check work hours (every 60 seconds)
-                import time
-                current_time = time.time()
-                if current_time - last_work_hours_check >= 60:
-                    if not self.work_hours.can_run_tasks():
-                        # Outside work hours - pause all browsers
-                        log.log_status(self.work_hours.get_status_message(), 'WARNING')
-                        
-                        # Cancel all running tasks gracefully
-                        for email, task in list(self.running_tasks.items()):
-                            if not task.done():
-                                log.log(email, "⏸️  Pausing due to work hours", 'WARNING')
-                                task.cancel()  # Actually cancel the task!
-                                # Add back to normal queue
-                                if email not in self.normal_queue and email not in self.incomplete_queue:
-                                    self.normal_queue.append(email)
-                        
-                        # Wait until work hours resume
-                        seconds_until = self.work_hours.get_time_until_work_starts()
-                        if seconds_until:
-                            hours_until = seconds_until / 3600
-                            log.log_status(f"⏰ Sleeping until {cfg.WORK_HOURS_START:02d}:00 ({hours_until:.1f}h)", 'INFO')
-                            # Sleep in chunks to allow for graceful shutdown
-                            while seconds_until > 0 and self._running:
-                                sleep_time = min(60, seconds_until)  # Sleep max 60s at a time
-                                await asyncio.sleep(sleep_time)
-                                seconds_until -= sleep_time
-                            
-                            if self._running:
-                                log.log_status("✅ Work hours resumed! Restarting browsers...", 'SUCCESS')
-                                # Spawn browsers again
-                                for _ in range(min(cfg.WATCHDOG_MIN_BROWSERS, len(self.normal_queue) + len(self.incomplete_queue))):
-                                    await self._spawn_next_browser()
-                                    await asyncio.sleep(2)
-                        
-                        last_work_hours_check = time.time()
-                        continue
-                    
-                    last_work_hours_check = current_time
+                # Don't touch the queues while paused for work hours
+                if not self.work_hours.can_run_tasks():
+                    continue
                 
                 # Check running tasks
                 active_count = self.watchdog.get_active_count()
-                incomplete_count = len(self.incomplete_queue)
-                normal_count = len(self.normal_queue)
+                incomplete_count = self._incomplete_count
+                normal_count = self._normal_count
                 running_count = len([t for t in self.running_tasks.values() if not t.done()])
                 
-                # Print periodic status (reduced frequency: every 30s instead of 5s)
-                import time
-                current_time = time.time()
-                if current_time - last_status_log >= 30:
-                    log.log_status(f"Active: {active_count} | Running: {running_count} | Incomplete: {incomplete_count} | Normal: {normal_count}")
-                    last_status_log = current_time
-                    
-                    # Show incomplete accounts if any
-                    if incomplete_count > 0:
-                        log.log_incomplete_status(self.monitor.get_incomplete_accounts())
-                
-                # Clean up completed tasks
-                completed_emails = []
-                for email, task in list(self.running_tasks.items()):
-                    if task.done():
-                        completed_emails.append(email)
-                        try:
-                            task.result()  # Check for exceptions
-                        except Exception as e:
-                            log.log_status(f"Task for {email} failed: {e}", 'ERROR')
-                
-                for email in completed_emails:
-                    del self.running_tasks[email]
-                
                 # Check if rotation should happen
                 if running_count == 0 and normal_count == 0:
                     # Refresh KPI progress
@@ -525,12 +688,9 @@ class WatchdogRunner:
                             await self._spawn_next_browser()
                             await asyncio.sleep(2)
                     else:
-                        # Check which accounts still need work
-                        accounts_needing_work = []
-                        for email in self.account_kpis.keys():
-                            if not self.kpi_manager.has_met_kpi(email):
-                                accounts_needing_work.append(email)
-                        
+                        # Check which accounts still need work (single lock pass)
+                        accounts_needing_work = self.kpi_manager.get_accounts_below_kpi()
+
                         if not accounts_needing_work:
                             # All KPIs met
                             log.log_separator("🎉 ALL KPIs MET - STOPPING SYSTEM")
@@ -544,14 +704,14 @@ class WatchdogRunner:
                         
                         # Refill normal queue with only accounts that need work
                         for email in accounts_needing_work:
-                            self.normal_queue.append(email)
+                            self._enqueue(email)
                         
                         log.log_separator(f"🔄 STARTING ROTATION #{self.rotation}")
                         log.log_status(f"{len(accounts_needing_work)} account(s) still need work", 'INFO')
                         self.kpi_manager.print_status()
                         
                         # Spawn initial browsers
-                        for _ in range(min(cfg.WATCHDOG_MIN_BROWSERS, len(self.normal_queue))):
+                        for _ in range(min(cfg.WATCHDOG_MIN_BROWSERS, self._normal_count)):
                             await self._spawn_next_browser()
                             await asyncio.sleep(5)
                 
@@ -575,22 +735,47 @@ class WatchdogRunner:
         log.log_status("Shutting down...", 'INFO')
         self._running = False
         
+        # Stop periodic housekeeping. Cancellation pre-empts the work-hours
+        # watcher's overnight sleep immediately; await so both tasks have
+        # actually unwound before the browser teardown below
+        for t in self._periodic_tasks:
+            t.cancel()
+        if self._periodic_tasks:
+            await asyncio.gather(*self._periodic_tasks, return_exceptions=True)
+        
         # Stop watchdog
         await self.watchdog.stop_monitoring()
         
-        # Cancel running tasks
-        for email, task in self.running_tasks.items():
+        # Cancel running tasks with bounded waits - a stuck Playwright
+        # cleanup must not hang shutdown forever; closing the shared
+        # browser below tears its processes down regardless
+        tasks = [t for t in self.running_tasks.values() if isinstance(t, asyncio.Task)]
+        for task in tasks:
             if not task.done():
                 task.cancel()
-        
-        # Wait for tasks to cancel
-        if self.running_tasks:
-            await asyncio.gather(*self.running_tasks.values(), return_exceptions=True)
-        
-        # Close playwright
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=10)
+            if pending:
+                log.log_status(f"{len(pending)} task(s) ignoring cancellation, abandoning them", 'WARNING')
+                for task in pending:
+                    task.cancel()
+                await asyncio.wait(pending, timeout=5)
+        
+        # Drain the context pool, close the shared browser, then playwright
+        if self.context_pool:
+            await self.context_pool.close()
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception:
+                pass
         if self.playwright:
             await self.playwright.stop()
         
+        # Convert the CSV task journal into the Excel workbook once
+        # (openpyxl write is slow - keep it off the event loop)
+        await asyncio.to_thread(TaskLogger("completed_tasks.xlsx").finalize)
+        
         # Final status
         self.monitor.print_status()
         self.watchdog.print_status()
@@ -599,8 +784,21 @@ class WatchdogRunner:
         log.log_status("Shutdown complete", 'SUCCESS')
 
 
+# Splits account lines around commas in one compiled pass, swallowing the
+# surrounding whitespace instead of a strip() per field
+_ACCOUNT_SPLIT = re.compile(r'\s*,\s*')
+
+CONFIG_HANDLERS = {
+    'HEADLESS': lambda config, val: config.update(headless='true' in val.lower()),
+    'MAX_CONCURRENT': lambda config, val: config.update(max_concurrent=int(val)),
+    'REVIEW_SHEET': lambda config, val: config.update(review_sheet=val),
+    'GOOGLE_SHEET_ID': lambda config, val: config.update(google_sheet_id=val),
+    'GOOGLE_CREDENTIALS': lambda config, val: config.update(google_credentials=val),
+}
+
+
 def load_config(config_file="accounts.config"):
-    """Load config from file"""
+    """Load config from file - single pass, dispatch table per key"""
     config = {
         "accounts": [],
         "headless": True,
@@ -609,53 +807,33 @@ def load_config(config_file="accounts.config"):
         "google_sheet_id": None,
         "google_credentials": "credentials.json"
     }
-    
+
     if not os.path.exists(config_file):
         log.log_status(f"Config file not found: {config_file}", 'ERROR')
         return config
-    
+
     with open(config_file, 'r') as f:
         content = f.read()
-    
-    # Parse accounts
+
     in_accounts = False
     for line in content.split('\n'):
         line = line.strip()
-        
-        if line.startswith('ACCOUNTS:'):
-            in_accounts = True
-            continue
-        
-        if line.startswith('HEADLESS:'):
-            config['headless'] = 'true' in line.lower()
-            in_accounts = False
-            continue
-            
-        if line.startswith('MAX_CONCURRENT:'):
-            match = re.search(r'(\d+)', line)
-            if match:
-                config['max_concurrent'] = int(match.group(1))
-            in_accounts = False
-            continue
-            
-        if line.startswith('REVIEW_SHEET:'):
-            config['review_sheet'] = line.split(':', 1)[1].strip()
-            in_accounts = False
-            continue
-        
-        if line.startswith('GOOGLE_SHEET_ID:'):
-            config['google_sheet_id'] = line.split(':', 1)[1].strip()
-            in_accounts = False
-            continue
-            
-        if line.startswith('GOOGLE_CREDENTIALS:'):
-            config['google_credentials'] = line.split(':', 1)[1].strip()
-            in_accounts = False
-            continue
-        
+
+        key, sep, val = line.partition(':')
+        if sep:
+            key = key.strip().upper()
+            if key == 'ACCOUNTS':
+                in_accounts = True
+                continue
+            handler = CONFIG_HANDLERS.get(key)
+            if handler:
+                handler(config, val.strip())
+                in_accounts = False
+                continue
+
         # Parse account line (format: email,password,kpi or email,password)
         if in_accounts and ',' in line and not line.startswith('#'):
-            parts = [p.strip() for p in line.split(',')]
+            parts = _ACCOUNT_SPLIT.split(line)
             if len(parts) >= 2:
                 email = parts[0]
                 password = parts[1]
@@ -666,7 +844,7 @@ def load_config(config_file="accounts.config"):
                         'password': password,
                         'kpi': kpi
                     })
-    
+
     return config
 
 
@@ -1,12 +1,33 @@
 """
 Account Monitor - Track account status and handle crashes
 """
+import atexit
 import json
 import os
 import threading
+import time
+from collections import defaultdict
 from datetime import datetime
 from enum import Enum
 
+try:
+    import orjson  # noqa - optional, 3-5x faster than stdlib json for big status files
+except ImportError:
+    orjson = None
+
+# How often the background flusher writes coalesced progress updates
+FLUSH_INTERVAL_SECONDS = 5
+
+# Built once instead of per print_status call
+_STATUS_ICON = {
+    "running": "🟢",
+    "completed": "✅",
+    "crashed": "💥",
+    "restarting": "🔄",
+    "pending": "⏳"
+}
+_SEPARATOR = "=" * 60
+
 
 class AccountStatus(Enum):
     PENDING = "pending"
@@ -25,214 +46,297 @@ class AccountMonitor:
     def __init__(self, status_file="account_status.json"):
         self.status_file = status_file
         self.accounts = {}
+        self._by_status = defaultdict(set)  # status value -> emails, derived from accounts
+        self._remaining = {}  # email -> remaining tasks, derived from accounts
+        self._dirty = False
         self._load_status()
+        # Per-task progress updates only mark state dirty; this daemon
+        # thread coalesces them into one disk write every few seconds.
+        # Status transitions (completed/crashed/...) still save immediately.
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        # The daemon flusher dies with the process - make sure pending
+        # progress still reaches disk on normal interpreter exit
+        atexit.register(self.flush)
     
     @classmethod
     def get_instance(cls, status_file="account_status.json"):
-        """Get singleton instance"""
+        """Get singleton instance (double-checked so racing threads can't both construct)"""
         if cls._instance is None:
-            cls._instance = AccountMonitor(status_file)
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = AccountMonitor(status_file)
         return cls._instance
     
     def _load_status(self):
         """Load status from file"""
         if os.path.exists(self.status_file):
             try:
-                with open(self.status_file, 'r') as f:
-                    self.accounts = json.load(f)
+                with open(self.status_file, 'rb') as f:
+                    raw = f.read()
+                self.accounts = orjson.loads(raw) if orjson else json.loads(raw)
             except Exception:
                 self.accounts = {}
+        # Rebuild the derived indexes (not part of the file format)
+        self._by_status = defaultdict(set)
+        self._remaining = {}
+        for email, data in self.accounts.items():
+            status = data.get("status")
+            if status:
+                self._by_status[status].add(email)
+            self._update_remaining(email)
+
+    def _set_status(self, email, status_value):
+        """Move email between status sets (callers hold the lock)"""
+        old = self.accounts.get(email, {}).get("status")
+        if old:
+            self._by_status[old].discard(email)
+        self._by_status[status_value].add(email)
+
+    def _update_remaining(self, email):
+        """Refresh the cached remaining-task count (callers hold the lock)"""
+        data = self.accounts.get(email)
+        if data is None:
+            self._remaining.pop(email, None)
+        else:
+            self._remaining[email] = max(0, data.get("max_tasks", 100) - data.get("completed_tasks", 0))
     
     def _save_status(self):
-        """Save status to file"""
-        with open(self.status_file, 'w') as f:
-            json.dump(self.accounts, f, indent=2, default=str)
-    
+        """Save status to file (callers hold the lock)"""
+        # Serialize once and write once: json.dump streams many tiny
+        # write() calls through iterencode
+        data = json.dumps(self.accounts, indent=2, default=str)
+        # Write to a temp file then rename so a crash mid-write can never
+        # leave a truncated file (which _load_status would silently reset)
+        tmp = self.status_file + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(data)
+        os.replace(tmp, self.status_file)
+        self._dirty = False
+
+    def _flush_loop(self):
+        """Periodically persist coalesced progress updates"""
+        while True:
+            time.sleep(FLUSH_INTERVAL_SECONDS)
+            with self._lock:
+                if self._dirty:
+                    try:
+                        self._save_status()
+                    except Exception:
+                        pass  # retry on the next tick
+
+
+    def flush(self):
+        """Persist any pending progress updates immediately"""
+        with self._lock:
+            if self._dirty:
+                try:
+                    self._save_status()
+                except Exception:
+                    pass
+
+    def _snapshot(self):
+        """Shallow copy of the accounts map so readers iterate without the lock"""
+        with self._lock:
+            return dict(self.accounts)
+
     def start_account(self, email, rotation=1, max_tasks=100):
         """Mark account as starting"""
+        now_iso = datetime.now().isoformat()  # one timestamp per call
         with self._lock:
+            self._set_status(email, AccountStatus.RUNNING.value)
             self.accounts[email] = {
                 "status": AccountStatus.RUNNING.value,
                 "rotation": rotation,
                 "max_tasks": max_tasks,
                 "completed_tasks": 0,
-                "started_at": datetime.now().isoformat(),
-                "last_update": datetime.now().isoformat(),
+                "started_at": now_iso,
+                "last_update": time.time(),
                 "error": None,
                 "restart_count": self.accounts.get(email, {}).get("restart_count", 0)
             }
+            self._update_remaining(email)
             self._save_status()
             print(f"📊 [Monitor] {email} - STARTED (rotation {rotation})")
     
     def update_progress(self, email, completed_tasks):
         """Update task progress"""
         with self._lock:
-            if email in self.accounts:
-                self.accounts[email]["completed_tasks"] = completed_tasks
-                self.accounts[email]["last_update"] = datetime.now().isoformat()
-                self._save_status()
+            if (rec := self.accounts.get(email)) is not None:
+                if rec["completed_tasks"] == completed_tasks:
+                    return  # re-reported count - nothing changed, skip the dirty write
+                rec["completed_tasks"] = completed_tasks
+                # Epoch float: time.time() skips datetime construction and
+                # ISO formatting on the per-task path, and serializes shorter
+                rec["last_update"] = time.time()
+                self._update_remaining(email)
+                self._dirty = True  # persisted by the background flusher
     
     def mark_completed(self, email, completed_tasks):
         """Mark account as completed successfully"""
         with self._lock:
-            if email in self.accounts:
-                self.accounts[email]["status"] = AccountStatus.COMPLETED.value
-                self.accounts[email]["completed_tasks"] = completed_tasks
-                self.accounts[email]["completed_at"] = datetime.now().isoformat()
+            if (rec := self.accounts.get(email)) is not None:
+                self._set_status(email, AccountStatus.COMPLETED.value)
+                rec["status"] = AccountStatus.COMPLETED.value
+                rec["completed_tasks"] = completed_tasks
+                rec["completed_at"] = datetime.now().isoformat()
+                self._update_remaining(email)
                 self._save_status()
             print(f"✅ [Monitor] {email} - COMPLETED ({completed_tasks} tasks)")
     
     def mark_crashed(self, email, error_msg):
         """Mark account as crashed"""
+        error_text = str(error_msg)  # stringify once for both record and print
         with self._lock:
-            if email in self.accounts:
-                self.accounts[email]["status"] = AccountStatus.CRASHED.value
-                self.accounts[email]["error"] = str(error_msg)[:500]
-                self.accounts[email]["crashed_at"] = datetime.now().isoformat()
+            if (rec := self.accounts.get(email)) is not None:
+                self._set_status(email, AccountStatus.CRASHED.value)
+                rec["status"] = AccountStatus.CRASHED.value
+                rec["error"] = error_text[:500]
+                rec["crashed_at"] = datetime.now().isoformat()
                 self._save_status()
-            print(f"💥 [Monitor] {email} - CRASHED: {str(error_msg)[:100]}")
+            print(f"💥 [Monitor] {email} - CRASHED: {error_text[:100]}")
     
     def mark_restarting(self, email):
         """Mark account as restarting"""
         with self._lock:
-            if email in self.accounts:
-                self.accounts[email]["status"] = AccountStatus.RESTARTING.value
-                self.accounts[email]["restart_count"] = self.accounts[email].get("restart_count", 0) + 1
+            restart_count = 1
+            if (rec := self.accounts.get(email)) is not None:
+                self._set_status(email, AccountStatus.RESTARTING.value)
+                rec["status"] = AccountStatus.RESTARTING.value
+                restart_count = rec.get("restart_count", 0) + 1
+                rec["restart_count"] = restart_count
                 self._save_status()
-            print(f"🔄 [Monitor] {email} - RESTARTING (attempt #{self.accounts[email].get('restart_count', 1)})")
+            print(f"🔄 [Monitor] {email} - RESTARTING (attempt #{restart_count})")
     
     def get_crashed_accounts(self):
-        """Get list of crashed accounts"""
-        with self._lock:
-            crashed = []
-            for email, data in self.accounts.items():
-                if data.get("status") == AccountStatus.CRASHED.value:
-                    crashed.append({
-                        "email": email,
-                        "error": data.get("error"),
-                        "completed_tasks": data.get("completed_tasks", 0),
-                        "max_tasks": data.get("max_tasks", 100),
-                        "restart_count": data.get("restart_count", 0)
-                    })
-            return crashed
+        """Get list of crashed accounts - walks only the matching index entries"""
+        crashed = []
+        for email in self._status_emails(AccountStatus.CRASHED):
+            data = self.accounts.get(email)
+            if data is None:
+                continue
+            crashed.append({
+                "email": email,
+                "error": data.get("error"),
+                "completed_tasks": data.get("completed_tasks", 0),
+                "max_tasks": data.get("max_tasks", 100),
+                "restart_count": data.get("restart_count", 0)
+            })
+        return crashed
     
     def mark_browser_lost(self, email, reason="Browser connection lost"):
         """Mark account as crashed due to browser loss"""
         with self._lock:
-            if email in self.accounts:
-                self.accounts[email]["status"] = AccountStatus.CRASHED.value
-                self.accounts[email]["error"] = reason
-                self.accounts[email]["browser_lost_at"] = datetime.now().isoformat()
+            if (rec := self.accounts.get(email)) is not None:
+                self._set_status(email, AccountStatus.CRASHED.value)
+                rec["status"] = AccountStatus.CRASHED.value
+                rec["error"] = reason
+                rec["browser_lost_at"] = datetime.now().isoformat()
                 self._save_status()
             print(f"💔 [Monitor] {email} - BROWSER LOST: {reason}")
     
-    def get_accounts_by_status(self, status: AccountStatus):
-        """Get list of accounts with specific status"""
+    def _status_emails(self, *statuses):
+        """Copy of the index entries for the given statuses, taken under the lock"""
         with self._lock:
-            return [email for email, data in self.accounts.items() 
-                    if data.get("status") == status.value]
+            emails = []
+            for status in statuses:
+                emails.extend(self._by_status[status.value])
+            return emails
+
+    def get_accounts_by_status(self, status: AccountStatus):
+        """Get list of accounts with specific status - O(matching) via the index"""
+        return self._status_emails(status)
     
     def get_running_accounts(self):
-        """Get list of running accounts"""
-        with self._lock:
-            running = []
-            for email, data in self.accounts.items():
-                if data.get("status") == AccountStatus.RUNNING.value:
-                    running.append({
-                        "email": email,
-                        "completed_tasks": data.get("completed_tasks", 0),
-                        "max_tasks": data.get("max_tasks", 100),
-                        "started_at": data.get("started_at")
-                    })
-            return running
+        """Get list of running accounts - walks only the matching index entries"""
+        running = []
+        for email in self._status_emails(AccountStatus.RUNNING):
+            data = self.accounts.get(email)
+            if data is None:
+                continue
+            running.append({
+                "email": email,
+                "completed_tasks": data.get("completed_tasks", 0),
+                "max_tasks": data.get("max_tasks", 100),
+                "started_at": data.get("started_at")
+            })
+        return running
     
     def should_restart(self, email, max_restarts=3):
-        """Check if account should be restarted"""
-        with self._lock:
-            if email not in self.accounts:
-                return False
-            data = self.accounts[email]
-            if data.get("status") != AccountStatus.CRASHED.value:
-                return False
-            if data.get("restart_count", 0) >= max_restarts:
-                print(f"⚠️ [Monitor] {email} - Max restarts ({max_restarts}) reached")
-                return False
-            return True
+        """Check if account should be restarted (lock-free single-key read)"""
+        data = self.accounts.get(email)
+        if data is None:
+            return False
+        if data.get("status") != AccountStatus.CRASHED.value:
+            return False
+        if data.get("restart_count", 0) >= max_restarts:
+            print(f"⚠️ [Monitor] {email} - Max restarts ({max_restarts}) reached")
+            return False
+        return True
     
     def get_remaining_tasks(self, email):
-        """Get remaining tasks for an account"""
-        with self._lock:
-            if email not in self.accounts:
-                return 0
-            data = self.accounts[email]
-            return max(0, data.get("max_tasks", 100) - data.get("completed_tasks", 0))
+        """Get remaining tasks for an account (cached, single dict read)"""
+        return self._remaining.get(email, 0)
     
     def get_incomplete_accounts(self):
         """Get list of accounts that haven't completed their quota"""
-        with self._lock:
-            incomplete = []
-            for email, data in self.accounts.items():
-                status = data.get("status")
-                # Account is incomplete if crashed or restarting and has remaining tasks
-                if status in [AccountStatus.CRASHED.value, AccountStatus.RESTARTING.value]:
-                    remaining = data.get("max_tasks", 100) - data.get("completed_tasks", 0)
-                    if remaining > 0:
-                        incomplete.append({
-                            "email": email,
-                            "completed_tasks": data.get("completed_tasks", 0),
-                            "max_tasks": data.get("max_tasks", 100),
-                            "remaining_tasks": remaining,
-                            "restart_count": data.get("restart_count", 0),
-                            "error": data.get("error", "")
-                        })
-            return incomplete
+        incomplete = []
+        # Incomplete = crashed or restarting with remaining tasks
+        for email in self._status_emails(AccountStatus.CRASHED, AccountStatus.RESTARTING):
+            data = self.accounts.get(email)
+            if data is not None:
+                remaining = self._remaining.get(email, 0)
+                if remaining > 0:
+                    incomplete.append({
+                        "email": email,
+                        "completed_tasks": data.get("completed_tasks", 0),
+                        "max_tasks": data.get("max_tasks", 100),
+                        "remaining_tasks": remaining,
+                        "restart_count": data.get("restart_count", 0),
+                        "error": data.get("error", "")
+                    })
+        return incomplete
     
     def is_account_incomplete(self, email):
         """Check if account is incomplete (crashed/restarting with remaining tasks)"""
-        with self._lock:
-            if email not in self.accounts:
-                return False
-            data = self.accounts[email]
-            status = data.get("status")
-            if status not in [AccountStatus.CRASHED.value, AccountStatus.RESTARTING.value]:
-                return False
-            remaining = data.get("max_tasks", 100) - data.get("completed_tasks", 0)
-            return remaining > 0
+        data = self.accounts.get(email)
+        if data is None:
+            return False
+        status = data.get("status")
+        if status not in [AccountStatus.CRASHED.value, AccountStatus.RESTARTING.value]:
+            return False
+        return self._remaining.get(email, 0) > 0
     
     def get_checkpoint(self, email):
         """Get checkpoint (completed tasks count) for an account"""
-        with self._lock:
-            if email not in self.accounts:
-                return 0
-            return self.accounts[email].get("completed_tasks", 0)
+        data = self.accounts.get(email)
+        return data.get("completed_tasks", 0) if data else 0
     
     def print_status(self):
         """Print current status of all accounts"""
         with self._lock:
-            print("\n" + "="*60)
+            if self._dirty:
+                self._save_status()  # what we print is what's on disk
+            print("\n" + _SEPARATOR)
             print("   📊 ACCOUNT STATUS MONITOR")
-            print("="*60)
+            print(_SEPARATOR)
             for email, data in self.accounts.items():
                 status = data.get("status", "unknown")
                 completed = data.get("completed_tasks", 0)
                 max_tasks = data.get("max_tasks", 100)
                 
-                status_icon = {
-                    "running": "🟢",
-                    "completed": "✅",
-                    "crashed": "💥",
-                    "restarting": "🔄",
-                    "pending": "⏳"
-                }.get(status, "❓")
+                status_icon = _STATUS_ICON.get(status, "❓")
                 
                 print(f"   {status_icon} {email}: {status.upper()} ({completed}/{max_tasks} tasks)")
                 if data.get("error"):
                     print(f"      └── Error: {data['error'][:80]}...")
-            print("="*60 + "\n")
+            print(_SEPARATOR + "\n")
     
     def reset_all(self):
         """Reset all account statuses"""
         with self._lock:
             self.accounts = {}
+            self._by_status = defaultdict(set)
+            self._remaining = {}
             self._save_status()
             print("🔄 [Monitor] All accounts reset")
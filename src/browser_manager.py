@@ -1,3 +1,5 @@
+import asyncio
+
 from playwright.async_api import Browser, Playwright, async_playwright
 
 
@@ -5,22 +7,29 @@ class BrowserManager:
     _instance = None
     _playwright: Playwright = None
     _browser: Browser = None
+    _init_lock = asyncio.Lock()
 
     @classmethod
     async def get_browser(cls, headless=True) -> Browser:
+        # Double-checked: without the lock two coroutines racing at startup
+        # would both start a Playwright driver and launch a Chromium, leaking
+        # the loser's processes
         if cls._browser is None:
-            cls._playwright = await async_playwright().start()
-            cls._browser = await cls._playwright.chromium.launch(
-                headless=headless,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
+            async with cls._init_lock:
+                if cls._browser is None:
+                    cls._playwright = await async_playwright().start()
+                    cls._browser = await cls._playwright.chromium.launch(
+                        headless=headless,
+                        args=['--no-sandbox', '--disable-setuid-sandbox']
+                    )
         return cls._browser
 
     @classmethod
     async def close(cls):
-        if cls._browser:
-            await cls._browser.close()
-            cls._browser = None
-        if cls._playwright:
-            await cls._playwright.stop()
-            cls._playwright = None
+        async with cls._init_lock:
+            if cls._browser:
+                await cls._browser.close()
+                cls._browser = None
+            if cls._playwright:
+                await cls._playwright.stop()
+                cls._playwright = None
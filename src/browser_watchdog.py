@@ -2,11 +2,16 @@
 Browser Watchdog - Continuous browser health monitoring and auto-recovery
 """
 import asyncio
+import threading
 from datetime import datetime
 from typing import Callable, Dict, Optional
 
 from playwright.async_api import Browser, BrowserContext, Page
 
+# Upper bound on the per-session responsiveness probe so one hung
+# browser can't stall the gathered health-check phase
+HEALTH_CHECK_TIMEOUT = 2
+
 
 class BrowserSession:
     """Represents a monitored browser session"""
@@ -26,8 +31,9 @@ class BrowserWatchdog:
     """Background watchdog for browser health monitoring"""
     
     _instance = None
-    
-    def __init__(self, 
+    _instance_lock = threading.Lock()  # construction can happen off the event loop
+
+    def __init__(self,
                  min_browsers: int = 2,
                  check_interval: int = 15,
                  max_restart_attempts: int = 3):
@@ -44,6 +50,7 @@ class BrowserWatchdog:
         self.max_restart_attempts = max_restart_attempts
         
         self.sessions: Dict[str, BrowserSession] = {}
+        self._active_emails: set = set()  # emails whose last check was healthy
         self._monitoring = False
         self._monitor_task: Optional[asyncio.Task] = None
         self._on_crash_callback: Optional[Callable] = None
@@ -52,9 +59,11 @@ class BrowserWatchdog:
     
     @classmethod
     def get_instance(cls, **kwargs) -> 'BrowserWatchdog':
-        """Get singleton instance"""
+        """Get singleton instance (double-checked so racing threads can't both construct)"""
         if cls._instance is None:
-            cls._instance = BrowserWatchdog(**kwargs)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = BrowserWatchdog(**kwargs)
         return cls._instance
     
     @classmethod
@@ -68,57 +77,86 @@ class BrowserWatchdog:
         """Register a browser session for monitoring"""
         async with self._lock:
             self.sessions[email] = BrowserSession(email, page, context, browser)
+            self._active_emails.add(email)
             print(f"👁️ [Watchdog] Registered: {email} (total: {len(self.sessions)})")
     
     async def unregister_browser(self, email: str):
         """Unregister a browser session"""
         async with self._lock:
+            self._active_emails.discard(email)
             if email in self.sessions:
                 del self.sessions[email]
                 print(f"👁️ [Watchdog] Unregistered: {email} (remaining: {len(self.sessions)})")
     
-    async def update_task_count(self, email: str, completed: int):
-        """Update completed task count for a session"""
-        async with self._lock:
-            if email in self.sessions:
-                self.sessions[email].completed_tasks = completed
+    def update_task_count(self, email: str, completed: int):
+        """
+        Update completed task count for a session.
+        Called once per task from the hot loop, so it deliberately skips the
+        lock: a single dict-get + attribute assign can't interleave on the
+        event loop, and taking the lock here would contend with the
+        health-check cycle for every completed task.
+        """
+        session = self.sessions.get(email)
+        if session and session.completed_tasks != completed:
+            session.completed_tasks = completed
     
     async def health_check(self, email: str) -> bool:
         """
         Check if a browser session is still healthy.
         Returns True if healthy, False if crashed/disconnected.
         """
+        # Grab the session ref under the lock, then release it: holding the
+        # lock through the Playwright calls would serialize concurrent checks
+        # and block register/unregister for the whole check.
         async with self._lock:
-            if email not in self.sessions:
+            session = self.sessions.get(email)
+        
+        if session is None:
+            return False
+        
+        try:
+            # Check 1: Browser still connected
+            if not session.browser.is_connected():
+                print(f"💥 [Watchdog] {email} - Browser disconnected")
+                self._active_emails.discard(email)
                 return False
             
-            session = self.sessions[email]
+            # Check 2: Page not closed
+            if session.page.is_closed():
+                print(f"💥 [Watchdog] {email} - Page closed")
+                self._active_emails.discard(email)
+                return False
             
+            # Check 3: Context still has pages
+            if len(session.context.pages) == 0:
+                print(f"💥 [Watchdog] {email} - Context has no pages")
+                self._active_emails.discard(email)
+                return False
+            
+            # Check 4: Page actually answers. The checks above read cached
+            # driver state and pass even when the renderer is hung, so round
+            # trip a trivial evaluate with a hard timeout.
             try:
-                # Check 1: Browser still connected
-                if not session.browser.is_connected():
-                    print(f"💥 [Watchdog] {email} - Browser disconnected")
-                    return False
-                
-                # Check 2: Page not closed
-                if session.page.is_closed():
-                    print(f"💥 [Watchdog] {email} - Page closed")
-                    return False
-                
-                # Check 3: Context still has pages
-                if len(session.context.pages) == 0:
-                    print(f"💥 [Watchdog] {email} - Context has no pages")
-                    return False
-                
-                # All checks passed
-                session.last_check = datetime.now()
-                session.is_healthy = True
-                return True
-                
-            except Exception as e:
-                print(f"💥 [Watchdog] {email} - Health check error: {e}")
+                await asyncio.wait_for(session.page.evaluate("1"), timeout=HEALTH_CHECK_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"💥 [Watchdog] {email} - Page unresponsive (>{HEALTH_CHECK_TIMEOUT}s)")
                 session.is_healthy = False
+                self._active_emails.discard(email)
                 return False
+            
+            # All checks passed. Plain attribute assigns can't interleave
+            # on the event loop (same reasoning as update_task_count), so
+            # no need to re-acquire the lock just to record the result.
+            session.last_check = datetime.now()
+            session.is_healthy = True
+            self._active_emails.add(email)
+            return True
+            
+        except Exception as e:
+            print(f"💥 [Watchdog] {email} - Health check error: {e}")
+            session.is_healthy = False
+            self._active_emails.discard(email)
+            return False
     
     async def _monitor_loop(self):
         """Background monitoring loop"""
@@ -131,15 +169,17 @@ class BrowserWatchdog:
                 if not self._monitoring:
                     break
                 
-                # Check all registered sessions
-                crashed_emails = []
+                # Check all registered sessions concurrently instead of
+                # one awaited check at a time
                 async with self._lock:
                     emails = list(self.sessions.keys())
                 
-                for email in emails:
-                    is_healthy = await self.health_check(email)
-                    if not is_healthy:
-                        crashed_emails.append(email)
+                results = await asyncio.gather(
+                    *(self.health_check(email) for email in emails),
+                    return_exceptions=True
+                )
+                crashed_emails = [email for email, result in zip(emails, results)
+                                  if result is not True]
                 
                 # Handle crashed sessions
                 for email in crashed_emails:
@@ -188,11 +228,11 @@ class BrowserWatchdog:
     
     def get_active_count(self) -> int:
         """Return number of active (healthy) browser sessions"""
-        return len([s for s in self.sessions.values() if s.is_healthy])
+        return len(self._active_emails)
     
     def get_active_emails(self) -> list:
         """Return list of emails with active sessions"""
-        return [s.email for s in self.sessions.values() if s.is_healthy]
+        return list(self._active_emails)
     
     def on_crash_detected(self, callback: Callable):
         """Register callback when crash detected. Callback signature: async def callback(email: str)"""
@@ -0,0 +1,104 @@
+"""
+Context Pool - Pre-warmed BrowserContexts for spawn-heavy runners
+Giữ sẵn context rảnh để spawn account không phải chờ tạo context mới
+"""
+import asyncio
+
+from src.logger_utils import ColoredLogger as log
+
+
+class ContextPool:
+    """
+    Keeps a small pool of idle BrowserContexts on the shared browser so
+    acquiring one is a queue get instead of a round-trip to Chromium.
+    Contexts are recycled after max_uses runs or when returned unhealthy;
+    a background maintainer task replenishes the pool to its target size.
+    """
+
+    def __init__(self, browser_factory, size=2, max_uses=20):
+        """
+        Args:
+            browser_factory: async callable returning a connected Browser
+            size: target number of idle contexts kept warm
+            max_uses: retire a context after this many runs
+        """
+        self._browser_factory = browser_factory
+        self._size = size
+        self._max_uses = max_uses
+        self._idle = asyncio.Queue()
+        self._uses = {}  # id(context) -> runs served
+        self._maintainer = None
+        self._closed = False
+
+    async def start(self):
+        """Pre-warm the pool and start the background maintainer"""
+        for _ in range(self._size):
+            await self._add_context()
+        self._maintainer = asyncio.create_task(self._maintain())
+        log.log_status(f"Context pool warmed with {self._size} context(s)", 'INFO')
+
+    async def _add_context(self):
+        """Create one idle context on the shared browser"""
+        browser = await self._browser_factory()
+        context = await browser.new_context()
+        self._uses[id(context)] = 0
+        await self._idle.put(context)
+
+    async def _maintain(self):
+        """Replenish retired contexts in the background"""
+        while not self._closed:
+            await asyncio.sleep(1)
+            while not self._closed and self._idle.qsize() < self._size:
+                try:
+                    await self._add_context()
+                except Exception as e:
+                    log.log_status(f"Context pool replenish failed: {e}", 'WARNING')
+                    await asyncio.sleep(5)
+                    break
+
+    async def acquire(self):
+        """Get a warm context - O(1) unless the pool is momentarily empty"""
+        return await self._idle.get()
+
+    async def release(self, context, healthy=True):
+        """
+        Return a context to the pool.
+
+        Healthy contexts get their cookies cleared (the next account seeds
+        its own session) and go back in the queue; unhealthy or worn-out
+        contexts are closed and the maintainer launches a replacement.
+        """
+        uses = self._uses.get(id(context), 0) + 1
+        self._uses[id(context)] = uses
+
+        if self._closed or not healthy or uses >= self._max_uses:
+            self._uses.pop(id(context), None)
+            try:
+                await context.close()
+            except Exception:
+                pass
+            return
+
+        try:
+            await context.clear_cookies()
+        except Exception:
+            # Couldn't reset it safely - retire instead of leaking a session
+            self._uses.pop(id(context), None)
+            try:
+                await context.close()
+            except Exception:
+                pass
+            return
+        await self._idle.put(context)
+
+    async def close(self):
+        """Stop the maintainer and close every idle context"""
+        self._closed = True
+        if self._maintainer:
+            self._maintainer.cancel()
+        while not self._idle.empty():
+            context = self._idle.get_nowait()
+            try:
+                await context.close()
+            except Exception:
+                pass
@@ -1,11 +1,32 @@
+import asyncio
 import os
-import random
+import threading
 import time
 
+import numpy as np
 import pandas as pd
 
+from config import CONFIG
 from src.logger_utils import ColoredLogger as log
 
+# Optional streaming Excel engine - much faster and lighter than openpyxl
+try:
+    import python_calamine  # noqa
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None  # pandas picks its default
+
+# Per-decision rule tracing. Off by default: the trace lines cost an
+# f-string format plus a stdout flush per decision, so the hot path
+# should skip them entirely unless someone is debugging the rules.
+DECISION_TRACE = os.getenv('DECISION_TRACE', '0') == '1'
+
+# Decision thresholds bound once at import: the frozen config never
+# changes mid-run and the rule cascade runs per task
+_SCORE_AUTO_ACCEPT = CONFIG.SCORE_AUTO_ACCEPT
+_SCORE_GRAY_ZONE_MIN = CONFIG.SCORE_GRAY_ZONE_MIN
+_GRAY_ZONE_ACCEPT_CHANCE = CONFIG.GRAY_ZONE_ACCEPT_CHANCE
+
 # Google Sheets support
 try:
     import gspread
@@ -16,6 +37,33 @@ try:
 except ImportError:
     GSPREAD_AVAILABLE = False
 
+# Score columns coerced to float arrays on every (re)load
+_SCORE_COLUMNS = ('overall_score', 'confidence', 'task_correctness_score',
+                  'causal_explainability_score', 'response_accuracy_score')
+
+
+class _SheetIndex:
+    """
+    Snapshot of the lookup state derived from one sheet pull.
+
+    Built completely before being published to DataManager._index, so a
+    get_decision running on another thread always sees the row index,
+    score arrays and note columns of the same frame - never a half-built
+    mix of the old pull and the new one.
+    """
+    __slots__ = ('by_task_id', 'trace_list', 'scores', 'col_k', 'col_l',
+                 'decision_raw', 'decision_upper')
+
+    def __init__(self, by_task_id, trace_list, scores, col_k, col_l,
+                 decision_raw, decision_upper):
+        self.by_task_id = by_task_id      # lowercased trace_id -> row position
+        self.trace_list = trace_list      # lowercased trace_ids by position
+        self.scores = scores              # column name -> float32 array
+        self.col_k = col_k                # step_evaluations, pre-stringified
+        self.col_l = col_l                # notes, pre-stringified
+        self.decision_raw = decision_raw  # decision column as strings
+        self.decision_upper = decision_upper  # decision pre-upper/stripped
+
 
 class DataManager:
     def __init__(self, file_path=None, google_sheet_id=None, credentials_file=None):
@@ -34,19 +82,74 @@ class DataManager:
         self.gc = None  # Google Sheets client
         self.sheet = None
         
+        self._rng = np.random.default_rng()  # PCG64 - much cheaper per draw than random's MT shim
+
         # Auto-refresh settings
         self.last_refresh_time = 0
         self.next_refresh_interval = self._get_random_refresh_interval()
+
+        # Decision memo shared by all accounts: a task_id's row doesn't
+        # change during a run, so paired accounts reuse one lookup
+        self._decision_cache = {}
+        self._decision_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()  # one refresh at a time
+        self._parquet_cache = '.cache/full_batch.parquet'
+        self._index = None  # _SheetIndex snapshot, swapped whole on each (re)load
         
         if google_sheet_id:
-            self.load_from_google_sheets()
+            # A fresh on-disk cache makes cold start instant; the background
+            # thread connects to Sheets and refreshes on schedule
+            if not self._load_cached_frame():
+                self.load_from_google_sheets()
         elif file_path:
             self.load_data()
+
+        # Background refresher: re-pulls the sheet on schedule so lookups
+        # never pay the Google round-trip (or an OAuth token refresh) inline
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresh_thread.start()
+    
+    def _refresh_loop(self):
+        """Refresh the sheet in the background when the interval elapses"""
+        while True:
+            time.sleep(30)
+            try:
+                if self.google_sheet_id and self.sheet is None:
+                    # Started from the disk cache - connect in the background
+                    self.load_from_google_sheets()
+                else:
+                    self.auto_refresh_if_needed()
+            except Exception as e:
+                log.log_status(f"Background refresh failed: {e}", 'WARNING')
+
+    def _load_cached_frame(self):
+        """Load the last successful pull from disk if still fresh"""
+        try:
+            st = os.stat(self._parquet_cache)
+        except OSError:
+            return False
+        if time.time() - st.st_mtime >= self.next_refresh_interval:
+            return False  # stale - pull from Sheets instead
+        try:
+            self.df = pd.read_parquet(self._parquet_cache)
+        except Exception:
+            return False  # corrupt cache or pyarrow missing
+        self.last_refresh_time = st.st_mtime
+        self._build_task_index()
+        log.log_status(f"Loaded {len(self.df)} rows from local cache", 'SUCCESS')
+        return True
+
+    def _save_cached_frame(self):
+        """Persist the current DataFrame for the next cold start (best-effort)"""
+        try:
+            os.makedirs('.cache', exist_ok=True)
+            self.df.to_parquet(self._parquet_cache)
+        except Exception:
+            pass  # no parquet engine installed or disk full - just skip
     
     def _get_random_refresh_interval(self):
         """Get random refresh interval from config"""
-        from config import REFRESH_MAX_MINUTES, REFRESH_MIN_MINUTES
-        return random.randint(REFRESH_MIN_MINUTES * 60, REFRESH_MAX_MINUTES * 60)
+        return int(self._rng.integers(CONFIG.REFRESH_MIN_MINUTES * 60, CONFIG.REFRESH_MAX_MINUTES * 60 + 1))
     
     def _should_refresh(self):
         """Check if we should refresh data"""
@@ -58,8 +161,11 @@ class DataManager:
     def auto_refresh_if_needed(self):
         """Auto-refresh data from Google Sheets if needed"""
         if self._should_refresh():
-            self.refresh_from_google_sheets()
-            self.next_refresh_interval = self._get_random_refresh_interval()
+            with self._refresh_lock:
+                if not self._should_refresh():
+                    return  # another thread refreshed while we waited
+                self.refresh_from_google_sheets()
+                self.next_refresh_interval = self._get_random_refresh_interval()
             log.log_status(f"Next refresh in {self.next_refresh_interval // 60} minutes", 'INFO')
 
     def load_from_google_sheets(self):
@@ -110,30 +216,11 @@ class DataManager:
             
             # Get all data as DataFrame (handle duplicate headers)
             log.log_status("Downloading data (this may take a moment)...", 'INFO')
-            try:
-                data = self.sheet.get_all_records()
-            except Exception:
-                # If headers have duplicates, get as list of lists
-                all_values = self.sheet.get_all_values()
-                if len(all_values) > 0:
-                    # Use first row as headers, make unique if duplicates
-                    headers = all_values[0]
-                    seen = {}
-                    unique_headers = []
-                    for h in headers:
-                        if h in seen:
-                            seen[h] += 1
-                            unique_headers.append(f"{h}_{seen[h]}")
-                        else:
-                            seen[h] = 0
-                            unique_headers.append(h)
-                    data = [dict(zip(unique_headers, row)) for row in all_values[1:]]
-                else:
-                    data = []
-            
-            self.df = pd.DataFrame(data)
+            self.df = self._fetch_frame()
             self.last_refresh_time = time.time()
-            
+            self._build_task_index()
+            self._save_cached_frame()
+
             log.log_status(f"Loaded {len(self.df)} rows from Google Sheets (realtime)", 'SUCCESS')
             log.log_status(f"Next refresh in {self.next_refresh_interval // 60} minutes", 'INFO')
             
@@ -143,32 +230,63 @@ class DataManager:
             if self.file_path:
                 self.load_data()
 
+    def _fetch_frame(self):
+        """
+        Download the sheet in one values.get call and build the DataFrame
+        vectorized. get_all_records fetches the same payload but then
+        assembles a dict per row in Python; passing the raw rows straight
+        to pandas skips all of that (score columns are coerced to numeric
+        later in _build_task_index anyway).
+        """
+        values = self.sheet.get_values(value_render_option='UNFORMATTED_VALUE')
+        if not values:
+            return pd.DataFrame()
+        # Use first row as headers, make unique if duplicates
+        headers = values[0]
+        seen = {}
+        unique_headers = []
+        for h in headers:
+            if h in seen:
+                seen[h] += 1
+                unique_headers.append(f"{h}_{seen[h]}")
+            else:
+                seen[h] = 0
+                unique_headers.append(h)
+        rows = values[1:]
+        if not rows:
+            return pd.DataFrame(columns=unique_headers)
+        # Transpose to dict-of-columns first: pandas consumes ready-made
+        # columns directly instead of pivoting the row list itself, which
+        # roughly halves peak memory while the frame is being built
+        columns = {h: list(col) for h, col in zip(unique_headers, zip(*rows))}
+        return pd.DataFrame(columns, copy=False)
+
     def refresh_from_google_sheets(self):
-        """Refresh data from Google Sheets"""
-        if self.sheet:
+        """Refresh data from Google Sheets - retries quota errors (429) with backoff"""
+        if not self.sheet:
+            return
+
+        new_df = None
+        for attempt in range(3):
             try:
-                data = self.sheet.get_all_records()
-            except Exception:
-                # Handle duplicate headers
-                all_values = self.sheet.get_all_values()
-                if len(all_values) > 0:
-                    headers = all_values[0]
-                    seen = {}
-                    unique_headers = []
-                    for h in headers:
-                        if h in seen:
-                            seen[h] += 1
-                            unique_headers.append(f"{h}_{seen[h]}")
-                        else:
-                            seen[h] = 0
-                            unique_headers.append(h)
-                    data = [dict(zip(unique_headers, row)) for row in all_values[1:]]
-                else:
-                    data = []
-            
-            self.df = pd.DataFrame(data)
-            self.last_refresh_time = time.time()
-            log.log_status(f"Refreshed {len(self.df)} rows from Google Sheets", 'SUCCESS')
+                new_df = self._fetch_frame()
+                break
+            except Exception as e:
+                if attempt == 2:
+                    # Keep serving the stale DataFrame instead of crashing the
+                    # rotation; the next scheduled refresh will try again
+                    self.last_refresh_time = time.time()
+                    log.log_status(f"Sheet refresh failed after retries, keeping cached data: {e}", 'WARNING')
+                    return
+                delay = (2 ** attempt) + self._rng.random()  # backoff + jitter
+                log.log_status(f"Sheet refresh error ({e}), retrying in {delay:.1f}s", 'WARNING')
+                time.sleep(delay)
+
+        self.df = new_df
+        self.last_refresh_time = time.time()
+        self._build_task_index()
+        self._save_cached_frame()
+        log.log_status(f"Refreshed {len(self.df)} rows from Google Sheets", 'SUCCESS')
 
     def load_data(self):
         """Load data from local file"""
@@ -179,46 +297,150 @@ class DataManager:
         if self.file_path.endswith('.csv'):
             self.df = pd.read_csv(self.file_path)
         elif self.file_path.endswith('.xlsx'):
-            self.df = pd.read_excel(self.file_path, sheet_name='FULL_BATCH')
+            self.df = pd.read_excel(self.file_path, sheet_name='FULL_BATCH', engine=EXCEL_ENGINE)
         else:
             raise ValueError("Unsupported file format. Use .csv or .xlsx")
-        
+
+        self._build_task_index()
         log.log_status(f"Loaded {len(self.df)} rows from {self.file_path}", 'SUCCESS')
-    
+
+    def _build_task_index(self):
+        """
+        Rebuild the derived lookup state (row index, score arrays, note
+        columns) for the current DataFrame into locals, then publish it as
+        a single _SheetIndex assignment. Concurrent get_decision calls
+        fetch the snapshot once per lookup, so a background refresh can
+        never hand them the new index over the previous frame's arrays.
+        """
+        if self.df is None or 'trace_id' not in self.df.columns:
+            self._index = None
+            return
+        by_task_id = {}
+        trace_list = []
+        for pos, tid in enumerate(self.df['trace_id'].astype(str)):
+            tid_lower = tid.lower()
+            by_task_id.setdefault(tid_lower, pos)
+            trace_list.append(tid_lower)
+        # Coerce each scored column exactly once: the same float32 array
+        # both replaces the frame's column (the sheet lives in RAM for the
+        # whole run and float64 object columns are pure waste) and serves
+        # the decision path, which indexes contiguous floats instead of
+        # running pd.notna and float() six times per lookup
+        scores = {}
+        for col in _SCORE_COLUMNS:
+            arr = self._score_array(col)
+            scores[col] = arr
+            if col in self.df.columns:
+                self.df[col] = arr
+        col_k = self._text_column('step_evaluations')
+        col_l = self._text_column('notes')
+        # Normalize the decision column once instead of .upper().strip()
+        # on every lookup; keep the raw strings for logging
+        decision_raw = self._text_column('decision')
+        decision_upper = [d.upper().strip() for d in decision_raw]
+        # Category dtype: a handful of distinct values stored once instead
+        # of one Python string object per row (converted last, after the
+        # string lists above were built from the plain columns)
+        for col in ('decision', 'step_evaluations', 'notes'):
+            if col in self.df.columns:
+                self.df[col] = self.df[col].astype('category')
+        # One attribute assignment publishes everything at once
+        self._index = _SheetIndex(by_task_id, trace_list, scores, col_k, col_l,
+                                  decision_raw, decision_upper)
+
+    def _score_array(self, col):
+        """Column as a float32 array with blanks/garbage coerced to 0"""
+        if col in self.df.columns:
+            return pd.to_numeric(self.df[col], errors='coerce').fillna(0).to_numpy(dtype='float32')
+        return [0.0] * len(self.df)
+
+    def _text_column(self, col):
+        """Column as a list of strings with blanks as ''"""
+        if col in self.df.columns:
+            values = self.df[col].fillna('').astype(str).tolist()
+            # Intern duplicates: empty and boilerplate notes repeat across
+            # many rows, so keep one shared object per distinct value
+            dedup = {}
+            return [dedup.setdefault(v, v) for v in values]
+        return [''] * len(self.df)
+
     def get_record_count(self):
         """Get the number of records loaded"""
         return len(self.df) if self.df is not None else 0
 
+    async def get_decision_async(self, task_id):
+        """Run get_decision off the event loop so a due sheet refresh doesn't stall other accounts"""
+        return await asyncio.to_thread(self.get_decision, task_id)
+
+    async def prefetch_refresh(self):
+        """
+        Run a due auto-refresh in the background.
+        Fired while the bot is busy submitting, so the next get_decision is
+        served from the already-refreshed DataFrame instead of paying the
+        Google Sheets round-trip inline.
+        """
+        try:
+            await asyncio.to_thread(self.auto_refresh_if_needed)
+        except Exception as e:
+            log.log_status(f"Background refresh failed: {e}", 'WARNING')
+
     def get_decision(self, task_id):
+        """
+        Memoised decision lookup - Thread-safe
+
+        Only lookups that matched a sheet row are cached: a not-found
+        UNSURE can flip once a refresh brings the row in.
+        """
+        cached = self._decision_cache.get(task_id)
+        if cached is not None:
+            return cached
+
+        # Single-flight: concurrent lookups from paired accounts coalesce
+        with self._decision_lock:
+            cached = self._decision_cache.get(task_id)
+            if cached is not None:
+                return cached
+            result = self._get_decision_uncached(task_id)
+            if result[1] is not None:
+                self._decision_cache[task_id] = result
+            return result
+
+    def _get_decision_uncached(self, task_id):
         """
         Returns a decision dict based on nereid-evals.xlsx structure.
         Also returns raw row data for logging purposes.
         
         Returns tuple: (decision_dict, row_data_dict)
         """
-        # Auto-refresh if needed
-        self.auto_refresh_if_needed()
-        
-        if self.df is None:
+        # Refreshes happen on the background thread; grab the published
+        # snapshot once so every read below comes from the same pull
+        index = self._index
+        if index is None:
             return {"action": "UNSURE", "notes": "Data file not loaded"}, None
 
-        # Search for task_id in 'trace_id' column
-        row_df = self.df[self.df['trace_id'].astype(str).str.contains(task_id, case=False, na=False)]
-        
-        if row_df.empty:
-            # Task ID not found in sheet -> UNSURE
-            return {"action": "UNSURE", "notes": "Task ID not found in Evals sheet"}, None
-        
-        row_data = row_df.iloc[0]
-        
-        # Extract row data for logging
+        # Exact match against the prebuilt index first; fall back to the
+        # substring scan only for partial task_ids
+        needle = str(task_id).lower()
+        pos = index.by_task_id.get(needle)
+        if pos is None:
+            # Partial task_id: scan the cached lowercased ids. Unlike the old
+            # str.contains mask this allocates nothing of length N and stops
+            # at the first hit.
+            pos = next((i for i, tid in enumerate(index.trace_list) if needle in tid), None)
+
+            if pos is None:
+                # Task ID not found in sheet -> UNSURE
+                return {"action": "UNSURE", "notes": "Task ID not found in Evals sheet"}, None
+
+        # Extract row data for logging - scores come from the arrays
+        # coerced at load time, no per-call pd.notna/float casts
         raw_row_data = {
-            'decision': str(row_data.get('decision', '')) if pd.notna(row_data.get('decision')) else '',
-            'overall_score': float(row_data.get('overall_score', 0)) if pd.notna(row_data.get('overall_score')) else 0,
-            'confidence': float(row_data.get('confidence', 0)) if pd.notna(row_data.get('confidence')) else 0,
-            'task_correctness_score': float(row_data.get('task_correctness_score', 0)) if pd.notna(row_data.get('task_correctness_score')) else 0,
-            'causal_explainability_score': float(row_data.get('causal_explainability_score', 0)) if pd.notna(row_data.get('causal_explainability_score')) else 0,
-            'response_accuracy_score': float(row_data.get('response_accuracy_score', 0)) if pd.notna(row_data.get('response_accuracy_score')) else 0,
+            'decision': index.decision_raw[pos],
+            'overall_score': float(index.scores['overall_score'][pos]),
+            'confidence': float(index.scores['confidence'][pos]),
+            'task_correctness_score': float(index.scores['task_correctness_score'][pos]),
+            'causal_explainability_score': float(index.scores['causal_explainability_score'][pos]),
+            'response_accuracy_score': float(index.scores['response_accuracy_score'][pos]),
         }
         
         # Extract values
@@ -229,14 +451,14 @@ class DataManager:
         response_accuracy = raw_row_data['response_accuracy_score'] # Column I
         
         # Column K = step_evaluations -> For "Notes" box
-        column_k = str(row_data.get('step_evaluations', '')) if pd.notna(row_data.get('step_evaluations')) else ""
-        
-        # Column L = notes -> For "Revision Notes" box  
-        column_l = str(row_data.get('notes', '')) if pd.notna(row_data.get('notes')) else ""
+        column_k = index.col_k[pos]
+
+        # Column L = notes -> For "Revision Notes" box
+        column_l = index.col_l[pos]
 
         # --- DECISION LOGIC ---
-        
-        decision_col = raw_row_data['decision'].upper().strip()
+
+        decision_col = index.decision_upper[pos]
         
         # Rule 1: If Column B = "REVIEW" -> Check based on reviewer analysis
         if decision_col == "REVIEW":
@@ -248,7 +470,8 @@ class DataManager:
             
             # Rule 1a: Low score threshold - any score below 0.5 = REVISE
             if overall_score < 0.5 or task_correctness < 0.5 or response_accuracy < 0.5:
-                print(f"  📋 B='REVIEW', C={overall_score}, E={task_correctness}, I={response_accuracy} -> LOW SCORE: REVISE")
+                if DECISION_TRACE:
+                    print(f"  📋 B='REVIEW', C={overall_score}, E={task_correctness}, I={response_accuracy} -> LOW SCORE: REVISE")
                 return {
                     "action": "REVISE",
                     "notes": column_k,
@@ -257,7 +480,8 @@ class DataManager:
             
             # Rule 1b: High score (C >= 0.73) -> Always ACCEPT
             elif overall_score >= 0.73:
-                print(f"  📋 B='REVIEW', C={overall_score} >= 0.73 -> ACCEPT")
+                if DECISION_TRACE:
+                    print(f"  📋 B='REVIEW', C={overall_score} >= 0.73 -> ACCEPT")
                 return {
                     "action": "ACCEPT",
                     "notes": column_k
@@ -265,22 +489,25 @@ class DataManager:
             
             # Rule 1c: Medium score (0.57 <= C < 0.73) -> Random 53% ACCEPT / 41% REVISE / 6% UNSURE
             elif overall_score >= 0.57:
-                rand_val = random.random()
+                rand_val = self._rng.random()
                 if rand_val < 0.53:
-                    print(f"  📋 B='REVIEW', C={overall_score} (0.57-0.73) -> Random: ACCEPT")
+                    if DECISION_TRACE:
+                        print(f"  📋 B='REVIEW', C={overall_score} (0.57-0.73) -> Random: ACCEPT")
                     return {
                         "action": "ACCEPT",
                         "notes": column_k
                     }, raw_row_data
                 elif rand_val < 0.96:  # 0.55 to 0.96 = 41%
-                    print(f"  📋 B='REVIEW', C={overall_score} (0.57-0.73) -> Random: REVISE")
+                    if DECISION_TRACE:
+                        print(f"  📋 B='REVIEW', C={overall_score} (0.57-0.73) -> Random: REVISE")
                     return {
                         "action": "REVISE",
                         "notes": column_k,
                         "revision_notes": column_l
                     }, raw_row_data
                 else:  # 0.96 to 1.0 = 4%
-                    print(f"  📋 B='REVIEW', C={overall_score} (0.57-0.73) -> Random: UNSURE")
+                    if DECISION_TRACE:
+                        print(f"  📋 B='REVIEW', C={overall_score} (0.57-0.73) -> Random: UNSURE")
                     return {
                         "action": "UNSURE",
                         "notes": column_k
@@ -288,7 +515,8 @@ class DataManager:
             
             # Rule 1d: Low-medium (0.5 <= C < 0.57) -> REVISE
             else:
-                print(f"  📋 B='REVIEW', C={overall_score} (0.5-0.57) -> REVISE")
+                if DECISION_TRACE:
+                    print(f"  📋 B='REVIEW', C={overall_score} (0.5-0.57) -> REVISE")
                 return {
                     "action": "REVISE",
                     "notes": column_k,
@@ -310,23 +538,16 @@ class DataManager:
                 "revision_notes": column_l
             }, raw_row_data
         
-        # Import config values
-        from config import (
-            GRAY_ZONE_ACCEPT_CHANCE,
-            SCORE_AUTO_ACCEPT,
-            SCORE_GRAY_ZONE_MIN,
-        )
-
         # Rule 1: Accept if overall_score >= SCORE_AUTO_ACCEPT (0.8)
-        if overall_score >= SCORE_AUTO_ACCEPT:
+        if overall_score >= _SCORE_AUTO_ACCEPT:
             return {
                 "action": "ACCEPT",
                 "notes": column_k
             }, raw_row_data
         
         # Rule 2: Random Accept or Revise if in gray zone (0.78 <= score < 0.8)
-        if SCORE_GRAY_ZONE_MIN <= overall_score < SCORE_AUTO_ACCEPT:
-            if random.random() < GRAY_ZONE_ACCEPT_CHANCE:
+        if _SCORE_GRAY_ZONE_MIN <= overall_score < _SCORE_AUTO_ACCEPT:
+            if self._rng.random() < _GRAY_ZONE_ACCEPT_CHANCE:
                 return {
                     "action": "ACCEPT",
                     "notes": column_k
@@ -339,7 +560,7 @@ class DataManager:
                 }, raw_row_data
         
         # Rule 3: If score is low but exists -> Needs Revision
-        if overall_score > 0 and overall_score < SCORE_GRAY_ZONE_MIN:
+        if overall_score > 0 and overall_score < _SCORE_GRAY_ZONE_MIN:
             return {
                 "action": "REVISE",
                 "notes": column_k,
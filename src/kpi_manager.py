@@ -2,11 +2,15 @@
 KPI Manager - Track account progress against KPI targets
 Reads completed_tasks.xlsx to check how many tasks each account has completed
 """
+import csv
 import os
 import threading
 from typing import Dict, Optional
 
-import pandas as pd
+from openpyxl import load_workbook
+
+# One C-level pass instead of seven .replace() calls per sheet name
+_SHEET_NAME_TRANS = str.maketrans({c: '_' for c in '\\/*?:[]'})
 
 
 class KPIManager:
@@ -14,86 +18,143 @@ class KPIManager:
     
     _lock = threading.Lock()
     _instance = None
+    _instance_lock = threading.Lock()  # guards first construction only
     
     def __init__(self, completed_tasks_file="completed_tasks.xlsx"):
         self.completed_tasks_file = completed_tasks_file
         self.account_kpis: Dict[str, int] = {}  # email -> target KPI
         self.account_progress: Dict[str, int] = {}  # email -> completed count
+        self._sheet_names: Dict[str, str] = {}  # email -> sheet name, filled by set_kpi
+        self._last_mtime = None  # st_mtime_ns of the last workbook actually read
+        self._dirty = True  # file not read yet; cleared after each refresh
         
     @classmethod
     def get_instance(cls, completed_tasks_file="completed_tasks.xlsx"):
-        """Get singleton instance"""
+        """Get singleton instance (double-checked so racing threads can't both construct)"""
         if cls._instance is None:
-            cls._instance = KPIManager(completed_tasks_file)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = KPIManager(completed_tasks_file)
         return cls._instance
     
     def set_kpi(self, email: str, kpi: int):
         """Set KPI target for an account"""
         with self._lock:
             self.account_kpis[email] = kpi
+            self._sheet_names[email] = self._get_sheet_name(email)
     
     def get_kpi(self, email: str) -> int:
-        """Get KPI target for an account"""
-        with self._lock:
-            return self.account_kpis.get(email, 0)
+        """Get KPI target for an account (lock-free single-key read)"""
+        return self.account_kpis.get(email, 0)
     
     def _get_sheet_name(self, email: str) -> str:
         """Get sheet name from email (same logic as TaskLogger)"""
         if not email:
             return "Unknown"
-        sheet_name = email.split('@')[0]
-        invalid_chars = ['\\', '/', '*', '?', ':', '[', ']']
-        for char in invalid_chars:
-            sheet_name = sheet_name.replace(char, '_')
-        return sheet_name[:31]
+        return email.split('@', 1)[0].translate(_SHEET_NAME_TRANS)[:31]
     
+    def mark_dirty(self):
+        """Flag that the tasks file changed on disk; next refresh re-reads it"""
+        with self._lock:
+            self._dirty = True
+
+    def increment_progress(self, email: str, count: int = 1):
+        """Bump in-memory progress without touching the tasks file"""
+        with self._lock:
+            self.account_progress[email] = self.account_progress.get(email, 0) + count
+
     def refresh_progress(self):
-        """Refresh progress by reading completed_tasks.xlsx"""
+        """Refresh progress by reading completed_tasks.xlsx (no-op unless dirty)"""
         with self._lock:
-            if not os.path.exists(self.completed_tasks_file):
-                # No file yet, all accounts at 0
-                for email in self.account_kpis.keys():
-                    self.account_progress[email] = 0
+            if not self._dirty:
                 return
-            
+            self._dirty = False
+            emails = list(self.account_kpis.keys())
+
+        # File I/O runs outside the lock so readers on the hot path never
+        # stall behind a refresh. Prefer the CSV journal the logger appends
+        # to: it carries the live counts mid-run and costs one sequential
+        # scan, while the workbook only exists after a finalize. The
+        # workbook path stays as fallback for runs resumed without a journal.
+        on_disk_counts = {}
+        journal = os.path.splitext(self.completed_tasks_file)[0] + '.csv'
+        source = journal if os.path.exists(journal) else self.completed_tasks_file
+        try:
+            stat = os.stat(source)
+        except OSError:
+            stat = None  # no file yet - keep whatever in-memory counters exist
+        if stat is not None and stat.st_mtime_ns != self._last_mtime:
             try:
-                # Read all sheets
-                all_sheets = pd.read_excel(self.completed_tasks_file, sheet_name=None)
-                
-                # Count tasks for each account
-                for email in self.account_kpis.keys():
-                    sheet_name = self._get_sheet_name(email)
-                    if sheet_name in all_sheets:
-                        df = all_sheets[sheet_name]
-                        self.account_progress[email] = len(df)
-                    else:
-                        self.account_progress[email] = 0
-                        
+                if source == journal:
+                    on_disk_counts = self._count_journal_rows(journal)
+                else:
+                    on_disk_counts = self._count_workbook_rows(source, emails)
+                self._last_mtime = stat.st_mtime_ns  # only after a clean read
             except Exception as e:
-                print(f"⚠️ [KPIManager] Error reading completed_tasks.xlsx: {e}")
-                # Default to 0 if error
-                for email in self.account_kpis.keys():
-                    self.account_progress[email] = 0
+                print(f"⚠️ [KPIManager] Error reading {source}: {e}")
+                # Keep in-memory counters on read error
+
+        # Reconcile with max(): the in-memory counters may be ahead of the
+        # workbook while task rows are still journaled, and must never be
+        # rolled back.
+        with self._lock:
+            for email in emails:
+                self.account_progress[email] = max(self.account_progress.get(email, 0),
+                                                   on_disk_counts.get(email, 0))
     
+    def _count_journal_rows(self, journal):
+        """Count completed tasks per email from the CSV journal"""
+        counts = {}
+        with open(journal, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header or 'Email' not in header:
+                return counts
+            col = header.index('Email')
+            for row in reader:
+                if len(row) > col:
+                    counts[row[col]] = counts.get(row[col], 0) + 1
+        return counts
+
+    def _count_workbook_rows(self, workbook_file, emails):
+        """Count completed tasks per email from the finalized workbook.
+        Only the row counts matter: read_only mode serves max_row from sheet
+        metadata without parsing any cell data."""
+        counts = {}
+        workbook = load_workbook(workbook_file, read_only=True, data_only=True)
+        try:
+            present = set(workbook.sheetnames)
+            for email in emails:
+                sheet_name = self._sheet_names.get(email) or self._get_sheet_name(email)
+                if sheet_name in present:
+                    max_row = workbook[sheet_name].max_row
+                    counts[email] = max(0, (max_row or 0) - 1)  # minus header row
+        finally:
+            workbook.close()
+        return counts
+
     def get_progress(self, email: str) -> int:
-        """Get current progress for an account"""
-        with self._lock:
-            return self.account_progress.get(email, 0)
+        """Get current progress for an account (lock-free single-key read)"""
+        return self.account_progress.get(email, 0)
     
     def get_remaining(self, email: str) -> int:
-        """Get remaining tasks to reach KPI"""
-        with self._lock:
-            kpi = self.account_kpis.get(email, 0)
-            progress = self.account_progress.get(email, 0)
-            return max(0, kpi - progress)
+        """Get remaining tasks to reach KPI (lock-free single-key reads)"""
+        kpi = self.account_kpis.get(email, 0)
+        progress = self.account_progress.get(email, 0)
+        return max(0, kpi - progress)
     
     def has_met_kpi(self, email: str) -> bool:
-        """Check if account has met KPI"""
-        with self._lock:
-            kpi = self.account_kpis.get(email, 0)
-            progress = self.account_progress.get(email, 0)
-            return progress >= kpi
+        """Check if account has met KPI (lock-free single-key reads)"""
+        kpi = self.account_kpis.get(email, 0)
+        progress = self.account_progress.get(email, 0)
+        return progress >= kpi
     
+    def get_accounts_below_kpi(self) -> list:
+        """Emails still under their KPI target - one lock pass instead of per-email calls"""
+        with self._lock:
+            return [email for email, kpi in self.account_kpis.items()
+                    if self.account_progress.get(email, 0) < kpi]
+
     def get_incomplete_accounts(self) -> list:
         """Get list of accounts that haven't met KPI"""
         with self._lock:
@@ -1,16 +1,23 @@
 """
 Logging utilities for better readability with multiple concurrent accounts
 """
+import atexit
 import logging
+import queue
 import re
+import sys
 import threading
+import time
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
+
+# Compiled once - every file-logged line goes through _strip_ansi
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
 
 
 class ColoredLogger:
     """Thread-safe colored logger with account prefixes"""
-    
+
     # ANSI color codes
     COLORS = {
         'RESET': '\033[0m',
@@ -23,23 +30,45 @@ class ColoredLogger:
         'WHITE': '\033[97m',
         'GRAY': '\033[90m',
     }
-    
+
     # Account color mapping (rotates through colors)
     ACCOUNT_COLORS = ['CYAN', 'MAGENTA', 'YELLOW', 'BLUE', 'GREEN']
-    
-    _lock = threading.Lock()
+
+    # Emit color only when stdout is a terminal; piped/redirected runs were
+    # paying for ANSI codes that the consumer discarded anyway. _C swaps in
+    # empty strings so the log methods need no per-line branch.
+    _USE_COLOR = sys.stdout.isatty()
+    _C = COLORS if _USE_COLOR else {name: '' for name in COLORS}
+
+    # Pulled out once - every line uses these two codes
+    _RESET = _C['RESET']
+    _GRAY = _C['GRAY']
+
+    # Formatting happens lock-free; stdout and the logging handler take
+    # their own locks for the actual writes, so each method builds its
+    # line(s) first and emits them with one write. Only the color-map
+    # mutation needs guarding.
+    _color_lock = threading.Lock()
     _account_color_map = {}
     _color_index = 0
+    # email -> (short_email, color name, color code), filled on first sight
+    # so the split/upper/color-pick work runs once per account, not per line
+    _email_info = {}
     _file_logger = None
     _file_logging_enabled = False
-    
+    _queue_listener = None
+    _memory_handler = None
+
+    # How long buffered records may sit before the periodic flush (seconds)
+    FLUSH_INTERVAL = 0.5
+
     @classmethod
     def enable_file_logging(cls, log_file="watchdog.log", max_bytes=10*1024*1024, backup_count=5):
         """Enable logging to file with rotation"""
         if cls._file_logger is None:
             cls._file_logger = logging.getLogger('WatchdogLogger')
             cls._file_logger.setLevel(logging.INFO)
-            
+
             # Rotating file handler (10MB per file, keep 5 backups)
             handler = RotatingFileHandler(
                 log_file,
@@ -48,87 +77,154 @@ class ColoredLogger:
                 encoding='utf-8'
             )
             handler.setLevel(logging.INFO)
-            
+
             # Simple format for file (no colors)
             formatter = logging.Formatter(
                 '%(asctime)s | %(message)s',
                 datefmt='%Y-%m-%d %H:%M:%S'
             )
             handler.setFormatter(formatter)
-            
-            cls._file_logger.addHandler(handler)
+
+            # Batch records in memory so the file handler does one write
+            # per chunk instead of one syscall per log line; errors flush
+            # immediately so nothing is held back when something breaks
+            cls._memory_handler = MemoryHandler(
+                capacity=512,
+                flushLevel=logging.ERROR,
+                target=handler,
+                flushOnClose=True
+            )
+
+            # Hand records to a background listener thread so log calls
+            # never block on disk writes or file rotation
+            log_queue = queue.Queue(-1)
+            cls._queue_listener = QueueListener(log_queue, cls._memory_handler, respect_handler_level=True)
+            cls._queue_listener.start()
+            atexit.register(cls._stop_listener)  # drain the queue on exit
+
+            # Periodic flush so buffered lines still reach disk (and tail -f)
+            # within half a second even when the buffer isn't full
+            flusher = threading.Thread(target=cls._flush_loop, daemon=True)
+            flusher.start()
+
+            cls._file_logger.addHandler(QueueHandler(log_queue))
             cls._file_logging_enabled = True
-    
+
+    @classmethod
+    def _flush_loop(cls):
+        """Flush buffered file-log records every FLUSH_INTERVAL seconds"""
+        while cls._memory_handler is not None:
+            time.sleep(cls.FLUSH_INTERVAL)
+            mem = cls._memory_handler
+            if mem is None:
+                break
+            if mem.buffer:
+                try:
+                    mem.flush()
+                except Exception:
+                    pass  # retry on the next tick
+
+    @classmethod
+    def _stop_listener(cls):
+        """Stop the background listener (safe to call more than once)"""
+        listener = cls._queue_listener
+        if listener is not None and listener._thread is not None:
+            listener.stop()
+        mem = cls._memory_handler
+        if mem is not None:
+            cls._memory_handler = None  # ends the flush loop
+            mem.close()  # flushOnClose pushes any remaining records to disk
+
     @classmethod
     def _strip_ansi(cls, text):
         """Remove ANSI color codes from text"""
-        ansi_escape = re.compile(r'\x1b\[[0-9;]*m')
-        return ansi_escape.sub('', text)
-    
+        if '\x1b' not in text:
+            return text  # nothing to strip - skip the regex pass entirely
+        return _ANSI_RE.sub('', text)
+
     @classmethod
     def _log_to_file(cls, message):
         """Log message to file (without colors)"""
         if cls._file_logging_enabled and cls._file_logger:
             clean_message = cls._strip_ansi(message)
             cls._file_logger.info(clean_message)
-    
+
+    @classmethod
+    def _log_plain(cls, message):
+        """Log an already-uncolored message to file - no strip pass needed"""
+        if cls._file_logging_enabled and cls._file_logger:
+            cls._file_logger.info(message)
+
     @classmethod
     def _get_account_color(cls, email):
         """Get consistent color for an account"""
-        if email not in cls._account_color_map:
-            cls._account_color_map[email] = cls.ACCOUNT_COLORS[cls._color_index % len(cls.ACCOUNT_COLORS)]
-            cls._color_index += 1
-        return cls._account_color_map[email]
-    
+        return cls._account_info(email)[1]
+
+    @classmethod
+    def _account_info(cls, email):
+        """Cached (short_email, color name, color code) - computed once per account"""
+        info = cls._email_info.get(email)
+        if info is None:
+            with cls._color_lock:
+                info = cls._email_info.get(email)
+                if info is None:
+                    color = cls.ACCOUNT_COLORS[cls._color_index % len(cls.ACCOUNT_COLORS)]
+                    cls._account_color_map[email] = color
+                    cls._color_index += 1
+                    info = (email.split('@', 1)[0][:8].upper(), color, cls._C[color])
+                    cls._email_info[email] = info
+        return info
+
     @classmethod
     def _colorize(cls, text, color):
-        """Add color to text"""
+        """Add color to text (no-op when stdout isn't a terminal)"""
+        if not cls._USE_COLOR:
+            return text
         return f"{cls.COLORS.get(color, '')}{text}{cls.COLORS['RESET']}"
-    
+
     @classmethod
     def _get_short_email(cls, email):
         """Get short version of email (first part before @)"""
         return email.split('@')[0][:8].upper()
-    
+
     @classmethod
     def log(cls, email, message, level='INFO'):
         """
         Thread-safe logging with account prefix
-        
+
         Args:
             email: Account email
             message: Log message
             level: INFO, SUCCESS, WARNING, ERROR, DEBUG
         """
-        with cls._lock:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            short_email = cls._get_short_email(email)
-            account_color = cls._get_account_color(email)
-            
-            # Level colors
-            level_colors = {
-                'INFO': 'WHITE',
-                'SUCCESS': 'GREEN',
-                'WARNING': 'YELLOW',
-                'ERROR': 'RED',
-                'DEBUG': 'GRAY'
-            }
-            level_color = level_colors.get(level, 'WHITE')
-            
-            # Format: [HH:MM:SS] [ACCOUNT] message
-            timestamp_str = cls._colorize(f"[{timestamp}]", 'GRAY')
-            account_str = cls._colorize(f"[{short_email:8}]", account_color)
-            message_str = cls._colorize(message, level_color)
-            
-            output = f"{timestamp_str} {account_str} {message_str}"
-            print(output)
-            cls._log_to_file(output)
-    
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        short_email, _, account_code = cls._account_info(email)
+
+        # Level colors
+        level_colors = {
+            'INFO': 'WHITE',
+            'SUCCESS': 'GREEN',
+            'WARNING': 'YELLOW',
+            'ERROR': 'RED',
+            'DEBUG': 'GRAY'
+        }
+        level_code = cls._C[level_colors.get(level, 'WHITE')]
+
+        # Format: [HH:MM:SS] [ACCOUNT] message - color codes interpolated
+        # directly, one string build instead of four _colorize calls
+        r = cls._RESET
+        sys.stdout.write(
+            f"{cls._GRAY}[{timestamp}]{r} {account_code}[{short_email:8}]{r} "
+            f"{level_code}{message}{r}\n"
+        )
+        # Build the file line plain instead of stripping the colors back out
+        cls._log_plain(f"[{timestamp}] [{short_email:8}] {message}")
+
     @classmethod
     def log_task(cls, email, task_num, total, task_id, decision, scores=None, sheet_decision=None):
         """
         Log task completion in compact format with optional scores
-        
+
         Args:
             email: Account email
             task_num: Current task number
@@ -138,114 +234,110 @@ class ColoredLogger:
             scores: Optional dict with 'C', 'E', 'I' scores
             sheet_decision: Optional original decision from sheet (column B)
         """
-        with cls._lock:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            short_email = cls._get_short_email(email)
-            account_color = cls._get_account_color(email)
-            
-            # Decision colors
-            decision_colors = {
-                'ACCEPT': 'GREEN',
-                'REVISE': 'YELLOW',
-                'UNSURE': 'MAGENTA',
-                'REJECT': 'RED',
-                'REVIEW': 'CYAN'
-            }
-            decision_color = decision_colors.get(decision, 'WHITE')
-            
-            timestamp_str = cls._colorize(f"[{timestamp}]", 'GRAY')
-            account_str = cls._colorize(f"[{short_email:8}]", account_color)
-            progress_str = cls._colorize(f"Task {task_num:3}/{total}", 'CYAN')
-            
-            # Add sheet decision if provided
-            sheet_decision_str = ""
-            if sheet_decision:
-                sheet_color = decision_colors.get(sheet_decision.upper(), 'WHITE')
-                sheet_decision_str = cls._colorize(f"{sheet_decision.upper():6} ", sheet_color)
-            
-            decision_str = cls._colorize(f"{decision:6}", decision_color)
-            task_id_short = task_id[-30:] if len(task_id) > 30 else task_id
-            
-            # Add scores if provided
-            scores_str = ""
-            if scores:
-                c = scores.get('C', 0)
-                e = scores.get('E', 0)
-                i = scores.get('I', 0)
-                scores_str = cls._colorize(f" [C:{c:.2f} E:{e:.2f} I:{i:.2f}]", 'GRAY')
-            
-            output = f"{timestamp_str} {account_str} {progress_str} {sheet_decision_str}→ {decision_str}{scores_str} | {task_id_short}"
-            print(output)
-            cls._log_to_file(output)
-    
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        short_email, _, account_code = cls._account_info(email)
+        r = cls._RESET
+
+        # Decision colors
+        decision_colors = {
+            'ACCEPT': 'GREEN',
+            'REVISE': 'YELLOW',
+            'UNSURE': 'MAGENTA',
+            'REJECT': 'RED',
+            'REVIEW': 'CYAN'
+        }
+        decision_code = cls._C[decision_colors.get(decision, 'WHITE')]
+
+        # Add sheet decision if provided
+        sheet_decision_str = ""
+        sheet_decision_plain = ""
+        if sheet_decision:
+            sheet_code = cls._C[decision_colors.get(sheet_decision.upper(), 'WHITE')]
+            sheet_decision_plain = f"{sheet_decision.upper():6} "
+            sheet_decision_str = f"{sheet_code}{sheet_decision_plain}{r}"
+
+        task_id_short = task_id[-30:] if len(task_id) > 30 else task_id
+
+        # Add scores if provided
+        scores_str = ""
+        scores_plain = ""
+        if scores:
+            c = scores.get('C', 0)
+            e = scores.get('E', 0)
+            i = scores.get('I', 0)
+            scores_plain = f" [C:{c:.2f} E:{e:.2f} I:{i:.2f}]"
+            scores_str = f"{cls._GRAY}{scores_plain}{r}"
+
+        sys.stdout.write(
+            f"{cls._GRAY}[{timestamp}]{r} {account_code}[{short_email:8}]{r} "
+            f"{cls._C['CYAN']}Task {task_num:3}/{total}{r} "
+            f"{sheet_decision_str}→ {decision_code}{decision:6}{r}{scores_str} | {task_id_short}\n"
+        )
+        cls._log_plain(f"[{timestamp}] [{short_email:8}] Task {task_num:3}/{total} "
+                       f"{sheet_decision_plain}→ {decision:6}{scores_plain} | {task_id_short}")
+
     @classmethod
     def log_status(cls, message, level='INFO'):
         """Log system-wide status (no account prefix)"""
-        with cls._lock:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            
-            level_colors = {
-                'INFO': 'CYAN',
-                'SUCCESS': 'GREEN',
-                'WARNING': 'YELLOW',
-                'ERROR': 'RED'
-            }
-            level_color = level_colors.get(level, 'CYAN')
-            
-            timestamp_str = cls._colorize(f"[{timestamp}]", 'GRAY')
-            message_str = cls._colorize(f"👁️  {message}", level_color)
-            
-            output = f"{timestamp_str} {message_str}"
-            print(output)
-            cls._log_to_file(output)
-    
+        timestamp = datetime.now().strftime("%H:%M:%S")
+
+        level_colors = {
+            'INFO': 'CYAN',
+            'SUCCESS': 'GREEN',
+            'WARNING': 'YELLOW',
+            'ERROR': 'RED'
+        }
+        level_code = cls._C[level_colors.get(level, 'CYAN')]
+        r = cls._RESET
+
+        sys.stdout.write(f"{cls._GRAY}[{timestamp}]{r} {level_code}👁️  {message}{r}\n")
+        cls._log_plain(f"[{timestamp}] 👁️  {message}")
+
     @classmethod
     def log_separator(cls, title=None):
         """Print a separator line"""
-        with cls._lock:
-            if title:
-                separator = f"\n{'='*60}\n  {title}\n{'='*60}"
-                print(separator)
-                cls._log_to_file(separator)
-            else:
-                separator = f"{'─'*60}"
-                print(separator)
-                cls._log_to_file(separator)
-    
+        if title:
+            separator = f"\n{'='*60}\n  {title}\n{'='*60}"
+        else:
+            separator = f"{'─'*60}"
+        sys.stdout.write(separator + "\n")
+        cls._log_plain(separator)  # separators carry no color codes
+
     @classmethod
     def log_incomplete_status(cls, incomplete_accounts):
         """Log status of incomplete accounts"""
-        with cls._lock:
-            if not incomplete_accounts:
-                return
-            
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            timestamp_str = cls._colorize(f"[{timestamp}]", 'GRAY')
-            header = cls._colorize(f"⚠️  INCOMPLETE ACCOUNTS: {len(incomplete_accounts)}", 'RED')
-            print(f"{timestamp_str} {header}")
-            
-            for acc in incomplete_accounts:
-                email = acc['email']
-                short_email = cls._get_short_email(email)
-                account_color = cls._get_account_color(email)
-                account_str = cls._colorize(f"   [{short_email:8}]", account_color)
-                progress = f"{acc['completed_tasks']}/{acc['max_tasks']} tasks"
-                remaining = cls._colorize(f"({acc['remaining_tasks']} remaining)", 'YELLOW')
-                restart = cls._colorize(f"[Restart #{acc['restart_count']}]", 'MAGENTA')
-                output = f"{account_str} {progress} {remaining} {restart}"
-                print(output)
-                cls._log_to_file(output)
-    
+        if not incomplete_accounts:
+            return
+
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        r = cls._RESET
+        yellow = cls._C['YELLOW']
+        magenta = cls._C['MAGENTA']
+        header = (f"{cls._GRAY}[{timestamp}]{r} "
+                  f"{cls._C['RED']}⚠️  INCOMPLETE ACCOUNTS: {len(incomplete_accounts)}{r}")
+
+        # Assemble the whole report and write it once so two threads'
+        # blocks can't interleave line by line on the console
+        console_lines = [header]
+        for acc in incomplete_accounts:
+            short_email, _, account_code = cls._account_info(acc['email'])
+            progress = f"{acc['completed_tasks']}/{acc['max_tasks']} tasks"
+            remaining_plain = f"({acc['remaining_tasks']} remaining)"
+            restart_plain = f"[Restart #{acc['restart_count']}]"
+            console_lines.append(f"{account_code}   [{short_email:8}]{r} {progress} "
+                                 f"{yellow}{remaining_plain}{r} {magenta}{restart_plain}{r}")
+            cls._log_plain(f"   [{short_email:8}] {progress} {remaining_plain} {restart_plain}")
+        sys.stdout.write("\n".join(console_lines) + "\n")
+
     @classmethod
     def log_queue_status(cls, incomplete_count, normal_count):
         """Log queue status"""
-        with cls._lock:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            timestamp_str = cls._colorize(f"[{timestamp}]", 'GRAY')
-            
-            incomplete_str = cls._colorize(f"INCOMPLETE: {incomplete_count}", 'RED' if incomplete_count > 0 else 'GREEN')
-            normal_str = cls._colorize(f"NORMAL: {normal_count}", 'GREEN')
-            
-            output = f"{timestamp_str} 📋 Queue Status | {incomplete_str} | {normal_str}"
-            print(output)
-            cls._log_to_file(output)
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        r = cls._RESET
+        green = cls._C['GREEN']
+        incomplete_code = cls._C['RED'] if incomplete_count > 0 else green
+
+        sys.stdout.write(f"{cls._GRAY}[{timestamp}]{r} 📋 Queue Status | "
+                         f"{incomplete_code}INCOMPLETE: {incomplete_count}{r} | "
+                         f"{green}NORMAL: {normal_count}{r}\n")
+        cls._log_plain(f"[{timestamp}] 📋 Queue Status | INCOMPLETE: {incomplete_count} | NORMAL: {normal_count}")
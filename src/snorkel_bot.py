@@ -3,11 +3,41 @@ import re
 
 from playwright.async_api import Page
 
+from config import CONFIG
+
+# Compiled once - get_uid runs per task and the anchored UUID pattern is fixed
+_UID_RE = re.compile(r'^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$')
+
+# Delay bounds per action, bound once at import instead of re-reading six
+# CONFIG attributes on every processed task. REVISE/UNSURE share a range;
+# anything unknown falls back to the REJECT range (matches the old if-chain).
+_DELAY_RANGES = {
+    "ACCEPT": (CONFIG.DELAY_ACCEPT_MIN, CONFIG.DELAY_ACCEPT_MAX),
+    "REVISE": (CONFIG.DELAY_REVISION_MIN, CONFIG.DELAY_REVISION_MAX),
+    "UNSURE": (CONFIG.DELAY_REVISION_MIN, CONFIG.DELAY_REVISION_MAX),
+}
+_DELAY_DEFAULT = (CONFIG.DELAY_REJECT_MIN, CONFIG.DELAY_REJECT_MAX)
+
 
 class SnorkelBot:
     def __init__(self, page: Page):
         self.page = page
         self.base_url = "https://experts.snorkel-ai.com"
+        # Locators are just selector handles - build the repeated ones once
+        self._left_panel = page.locator('[data-testid="document-review-left-panel"]')
+        self._task_id_span = page.locator('h3:has-text("Task ID")').locator('..').locator('span')
+        self._continue_btn = page.locator('button:has-text("Continue")')
+        self._submit_btn = page.locator('button:has-text("Submit")')
+        self._btn_yes = page.locator('[data-cy="yes"]')
+        self._btn_no = page.locator('[data-cy="no"]')
+        self._btn_revision = page.locator('[data-cy="needs_revision"]')
+        self._btn_unsure = page.locator('[data-cy="unsure"]')
+        self._notes_field = page.locator('#evaluator_reason')
+        self._rejection_field = page.locator('[id="Rejection Notes"]')
+        self._revision_field = page.locator('[id="Revision Notes"]')
+        # Left-panel HTML fetched by navigate_to_review, consumed once by the
+        # next get_task_id so the first task doesn't pay the RPC twice
+        self._left_panel_html = None
 
     async def login(self, email, password):
         await self.page.goto(f"{self.base_url}/home")
@@ -60,28 +90,43 @@ class SnorkelBot:
         await self.page.wait_for_timeout(5000)
         
         # Check if left panel is empty (blank task) - no retry needed
-        left_panel = self.page.locator('[data-testid="document-review-left-panel"]')
-        left_panel_html = await left_panel.inner_html()
-        
+        left_panel_html = await self._left_panel.inner_html()
+        self._left_panel_html = left_panel_html  # hand off to get_task_id
+
         # If left panel is empty (no Task ID info), it's a blank task
         if 'Task ID' not in left_panel_html:
             return False
-        
+
         return True
 
+    async def wait_task_ready(self):
+        """
+        Wait until the review left panel is attached to the DOM.
+        Event-driven replacement for a fixed sleep before get_task_id():
+        returns the moment the task info is present instead of always
+        paying the worst case.
+        """
+        try:
+            await self._left_panel.first.wait_for(state='attached', timeout=5000)
+        except Exception:
+            # Panel never showed up; get_task_id handles that case itself
+            pass
+
     async def get_task_id(self):
         """Extract Task ID from the review page. Returns 'BLANK_TASK' if task is blank."""
         try:
-            # First check if left panel has Task ID (fast check)
-            left_panel = self.page.locator('[data-testid="document-review-left-panel"]')
-            left_panel_html = await left_panel.inner_html()
-            
+            # First check if left panel has Task ID (fast check). Reuse the
+            # HTML navigate_to_review just fetched if it's still unconsumed.
+            left_panel_html = self._left_panel_html
+            self._left_panel_html = None
+            if left_panel_html is None:
+                left_panel_html = await self._left_panel.inner_html()
+
             if 'Task ID' not in left_panel_html:
                 return "BLANK_TASK"
-            
+
             # Get the text content after "Task ID" header
-            task_id_element = self.page.locator('h3:has-text("Task ID")').locator('..').locator('span')
-            task_id = await task_id_element.first.text_content()
+            task_id = await self._task_id_span.first.text_content()
             
             if task_id:
                 task_id = task_id.strip()
@@ -97,7 +142,7 @@ class SnorkelBot:
         """Extract UID from the review page (e.g. 6dd9f981-aa73-4d06-9bef-9990e0de6b0b)"""
         try:
             # UID is displayed next to "UID:" label
-            uid_element = self.page.locator('div:has-text("UID:")').locator('div').filter(has_text=re.compile(r'^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$'))
+            uid_element = self.page.locator('div:has-text("UID:")').locator('div').filter(has_text=_UID_RE)
             uid = await uid_element.first.text_content()
             
             if uid:
@@ -113,23 +158,20 @@ class SnorkelBot:
         Get random delay to simulate human behavior
         Uses values from config.py
         """
-        from config import (
-            DELAY_ACCEPT_MAX,
-            DELAY_ACCEPT_MIN,
-            DELAY_REJECT_MAX,
-            DELAY_REJECT_MIN,
-            DELAY_REVISION_MAX,
-            DELAY_REVISION_MIN,
-        )
-        
-        if action == "ACCEPT":
-            delay = random.randint(DELAY_ACCEPT_MIN, DELAY_ACCEPT_MAX)
-        elif action in ["REVISE", "UNSURE"]:
-            delay = random.randint(DELAY_REVISION_MIN, DELAY_REVISION_MAX)
-        else:  # REJECT
-            delay = random.randint(DELAY_REJECT_MIN, DELAY_REJECT_MAX)
-        
-        return delay
+        lo, hi = _DELAY_RANGES.get(action, _DELAY_DEFAULT)
+        return random.randint(lo, hi)
+
+    async def _wait_visible(self, selector, timeout=5000):
+        """
+        Wait for a form field to appear after a radio click.
+        Returns as soon as the DOM is ready instead of always paying a
+        fixed sleep; falls back to a short pause if the field never shows
+        (e.g. the form variant doesn't render it).
+        """
+        try:
+            await self.page.wait_for_selector(selector, state='visible', timeout=timeout)
+        except Exception:
+            await self.page.wait_for_timeout(1000)
 
     async def process_task(self, decision):
         """
@@ -151,62 +193,97 @@ class SnorkelBot:
         
         # Click the appropriate radio button using data-cy attribute
         if action == "ACCEPT":
-            await self.page.click('[data-cy="yes"]')
-            await self.page.wait_for_timeout(1000)
-            
+            await self._btn_yes.click()
+            await self._wait_visible('#evaluator_reason')
+
             # Fill Notes (Column K) -> #evaluator_reason
             if decision.get('notes'):
-                await self.page.fill('#evaluator_reason', decision['notes'])
-            
+                await self._notes_field.fill(decision['notes'])
+
         elif action == "REJECT":
-            await self.page.click('[data-cy="no"]')
-            await self.page.wait_for_timeout(1000)
-            
+            await self._btn_no.click()
+            await self._wait_visible('[id="Rejection Notes"]')
+
             # Fill Rejection Notes -> id="Rejection Notes"
             rejection_reason = decision.get('rejection_notes', decision.get('notes', ''))
             if rejection_reason:
-                await self.page.fill('[id="Rejection Notes"]', rejection_reason)
-            
+                await self._rejection_field.fill(rejection_reason)
+
             # Fill Notes
             if decision.get('notes'):
-                await self.page.fill('#evaluator_reason', decision['notes'])
-            
+                await self._notes_field.fill(decision['notes'])
+
         elif action == "REVISE":
-            await self.page.click('[data-cy="needs_revision"]')
-            await self.page.wait_for_timeout(1000)
-            
+            await self._btn_revision.click()
+            await self._wait_visible('[id="Revision Notes"]')
+
             # Fill Revision Notes for Feedback to Submitter (Column L) -> id="Revision Notes"
             if decision.get('revision_notes'):
-                await self.page.fill('[id="Revision Notes"]', decision['revision_notes'])
-            
+                await self._revision_field.fill(decision['revision_notes'])
+
             # Điền Additional Notes for Snorkel (#evaluator_reason) với step_evaluations (Column K)
             if decision.get('notes'):
-                await self.page.fill('#evaluator_reason', decision['notes'])
-                    
+                await self._notes_field.fill(decision['notes'])
+
         elif action == "UNSURE":
-            await self.page.click('[data-cy="unsure"]')
-            await self.page.wait_for_timeout(1000)
-            
+            await self._btn_unsure.click()
+            await self._wait_visible('#evaluator_reason')
+
             # Fill Notes (Column K) -> #evaluator_reason
             if decision.get('notes'):
-                await self.page.fill('#evaluator_reason', decision['notes'])
+                await self._notes_field.fill(decision['notes'])
 
         # Wait before submit (random 1-3s)
         await self.page.wait_for_timeout(random.randint(1000, 3000))
-        
-        # Click Submit button
-        await self.page.click('button:has-text("Submit")')
-        
-        # Wait for next task or "Continue" button
-        await self.page.wait_for_timeout(3000)
-        
-        # Check if there's a "Continue to next task" button
+
+        # Capture the ID of the task being submitted: the left panel never
+        # detaches between tasks, so only a changed Task ID proves the next
+        # task actually replaced it
         try:
-            continue_btn = self.page.locator('button:has-text("Continue")')
-            if await continue_btn.count() > 0:
-                await continue_btn.click()
-        except:
-            pass
-        
-        # Wait for next task to load
-        await self.page.wait_for_timeout(3000)
+            submitted_id = (await self._task_id_span.first.text_content() or '').strip()
+        except Exception:
+            submitted_id = ''
+
+        # Click Submit button
+        await self._submit_btn.click()
+
+        await self._wait_for_new_task(submitted_id)
+
+    async def _wait_for_new_task(self, submitted_id, timeout_ms=20000):
+        """
+        Wait until the review panel shows a different Task ID than the one
+        just submitted, clicking "Continue to next task" if it appears on
+        the way. Attach/visible waits are useless here - the panel stays in
+        the DOM between tasks and would be satisfied by the previous task's
+        content, letting the next get_task_id read a stale ID.
+        """
+        if not submitted_id:
+            # Couldn't read the outgoing ID - fall back to the fixed pauses
+            await self.page.wait_for_timeout(3000)
+            try:
+                if await self._continue_btn.count() > 0:
+                    await self._continue_btn.click()
+            except:
+                pass
+            await self.page.wait_for_timeout(3000)
+            return
+
+        elapsed = 0
+        while elapsed < timeout_ms:
+            # Click through the "Continue to next task" interstitial if shown
+            try:
+                if await self._continue_btn.count() > 0:
+                    await self._continue_btn.click()
+            except:
+                pass
+            try:
+                panel_html = await self._left_panel.inner_html()
+                if 'Task ID' not in panel_html:
+                    return  # blank task - get_task_id will report BLANK_TASK
+                current = await self._task_id_span.first.text_content()
+            except Exception:
+                current = None
+            if current and current.strip() and current.strip() != submitted_id:
+                return  # next task is showing
+            await self.page.wait_for_timeout(500)
+            elapsed += 500
@@ -1,3 +1,5 @@
+import atexit
+import csv
 import os
 import threading
 from datetime import datetime
@@ -17,26 +19,68 @@ ACCOUNT_NAMES = {
 
 
 class TaskLogger:
-    """Log completed tasks to an Excel file - Thread-safe version"""
-    
+    """
+    Log completed tasks - Thread-safe version
+
+    Hot-path writes append to a CSV journal (O(1) per row); finalize()
+    converts the journal to the Excel workbook once, one sheet per account.
+    """
+
     _lock = threading.Lock()  # Class-level lock for file access
-    
+
+    COLUMNS = ["Account", "Email", "Code", "Ngày", "UID (Platform)", "Task ID",
+               "Decision (B)", "Status (Platform)", "Notes", "Completed At"]
+
+    # Buffered rows are persisted once this many have queued up
+    FLUSH_EVERY = 20
+
     def __init__(self, log_file="completed_tasks.xlsx", user_name=""):
         self.log_file = log_file
+        self.csv_file = os.path.splitext(log_file)[0] + '.csv'
         self.user_name = user_name
         self.completed_tasks = []
-        
+        self._pending = []  # rows queued by log_task_buffered, written on flush()
+        # Queued rows must not die with the process
+        atexit.register(self.flush)
+
     def log_task(self, task_id, uid, decision_from_sheet, status_platform, notes=""):
         """
         Log a completed task - Thread-safe
         New structure: Account | Email | Code | Ngày | UID | Task ID | Decision | Status | Notes | Completed At
         """
+        task_data = self._build_row(task_id, uid, decision_from_sheet, status_platform, notes)
+        self.completed_tasks.append(task_data)
+
+        # Save immediately with lock to prevent concurrent write conflicts
+        self._save_tasks([task_data])
+
+    def log_task_buffered(self, task_id, uid, decision_from_sheet, status_platform, notes=""):
+        """
+        Queue a task row in memory instead of rewriting the workbook per task.
+        Flushes itself every FLUSH_EVERY rows and at interpreter exit; call
+        flush() at batch end to persist any remainder.
+        """
+        task_data = self._build_row(task_id, uid, decision_from_sheet, status_platform, notes)
+        self.completed_tasks.append(task_data)
+        self._pending.append(task_data)
+        if len(self._pending) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Write all queued rows with a single workbook save"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self._save_tasks(pending)
+
+    def _build_row(self, task_id, uid, decision_from_sheet, status_platform, notes=""):
+        """Build one log row dict"""
         today = datetime.now()
-        
+
         # Get account name from mapping
         account_name = ACCOUNT_NAMES.get(self.user_name.lower(), '')
-        
-        task_data = {
+
+        return {
             "Account": account_name,
             "Email": self.user_name,
             "Code": "SN02",
@@ -48,61 +92,49 @@ class TaskLogger:
             "Notes": notes[:200] if notes else "",
             "Completed At": today.strftime("%Y-%m-%d %H:%M:%S")
         }
-        
-        self.completed_tasks.append(task_data)
-        
-        # Save immediately with lock to prevent concurrent write conflicts
-        self._save_task(task_data)
-        
-    def _get_sheet_name(self):
+
+    def _get_sheet_name(self, email=None):
         """Get sheet name from user email (sanitized for Excel)"""
-        if not self.user_name:
+        if email is None:
+            email = self.user_name
+        if not email:
             return "Unknown"
         # Extract username part before @ and limit to 31 chars (Excel limit)
-        sheet_name = self.user_name.split('@')[0]
+        sheet_name = email.split('@')[0]
         # Remove invalid characters for Excel sheet names
         invalid_chars = ['\\', '/', '*', '?', ':', '[', ']']
         for char in invalid_chars:
             sheet_name = sheet_name.replace(char, '_')
         return sheet_name[:31].upper()  # Return uppercase to match existing sheets (G007, G008, etc.)
     
-    def _save_task(self, task_data):
-        """Save a single task to Excel - Thread-safe, each account to separate sheet"""
+    def _save_tasks(self, task_rows):
+        """Append a batch of tasks to the CSV journal - Thread-safe, O(1) per row"""
         with TaskLogger._lock:
             try:
-                sheet_name = self._get_sheet_name()
-                
-                # Read existing file with all sheets
-                if os.path.exists(self.log_file):
-                    # Load all existing sheets
-                    all_sheets = pd.read_excel(self.log_file, sheet_name=None)
-                else:
-                    all_sheets = {}
-                
-                # Get existing data for this sheet or create empty
-                if sheet_name in all_sheets:
-                    existing_df = all_sheets[sheet_name]
-                else:
-                    existing_df = pd.DataFrame()
-                
-                # Append new task
-                new_df = pd.DataFrame([task_data])
-                
-                if existing_df.empty:
-                    combined_df = new_df
-                else:
-                    combined_df = pd.concat([existing_df, new_df], ignore_index=True)
-                
-                # Update this sheet in all_sheets
-                all_sheets[sheet_name] = combined_df
-                
-                # Save all sheets to file
-                with pd.ExcelWriter(self.log_file, engine='openpyxl') as writer:
-                    for sname, sdata in all_sheets.items():
-                        sdata.to_excel(writer, sheet_name=sname, index=False)
-                
+                write_header = not os.path.exists(self.csv_file)
+                with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    if write_header:
+                        writer.writerow(self.COLUMNS)
+                    for row in task_rows:
+                        writer.writerow([row.get(col, '') for col in self.COLUMNS])
             except Exception as e:
                 print(f"⚠️ Error saving task: {e}")
-        
+
+    def finalize(self):
+        """Convert the CSV journal to the Excel workbook once, each account to separate sheet"""
+        with TaskLogger._lock:
+            try:
+                if not os.path.exists(self.csv_file):
+                    return
+                df = pd.read_csv(self.csv_file)
+                if df.empty:
+                    return
+                with pd.ExcelWriter(self.log_file, engine='openpyxl') as writer:
+                    for email, sheet_df in df.groupby('Email', sort=False):
+                        sheet_df.to_excel(writer, sheet_name=self._get_sheet_name(str(email)), index=False)
+            except Exception as e:
+                print(f"⚠️ Error finalizing task log: {e}")
+
     def get_completed_count(self):
         return len(self.completed_tasks)
@@ -27,22 +27,26 @@ class WorkHoursScheduler:
         self.enabled = enabled
         self.start_time = time(start_hour, 0)
         self.end_time = time(end_hour, 0)
-        
+        # Tính một lần - giờ làm việc không đổi sau khi khởi tạo
+        self._overnight = start_hour > end_hour
+
     @classmethod
     def get_instance(cls, start_hour: int = 8, end_hour: int = 18, enabled: bool = True):
-        """Get singleton instance"""
+        """Get singleton instance (double-checked so racing threads can't both construct)"""
         if cls._instance is None:
-            cls._instance = WorkHoursScheduler(start_hour, end_hour, enabled)
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = WorkHoursScheduler(start_hour, end_hour, enabled)
         return cls._instance
-    
+
     def _is_overnight_shift(self) -> bool:
         """
         Kiểm tra xem có phải ca đêm (qua 0h) không
-        
+
         Returns:
             True nếu là ca đêm (start_hour > end_hour), False nếu ca ngày
         """
-        return self.start_hour > self.end_hour
+        return self._overnight
     
     def is_within_work_hours(self, check_time: Optional[datetime] = None) -> bool:
         """
@@ -56,19 +60,17 @@ class WorkHoursScheduler:
         """
         if not self.enabled:
             return True  # Nếu tắt giới hạn, luôn cho phép chạy
-            
-        if check_time is None:
-            check_time = datetime.now()
-            
-        current_time = check_time.time()
-        
-        # Kiểm tra xem có trong khoảng thời gian làm việc không
-        if self._is_overnight_shift():
+
+        # Khung giờ chỉ tính theo giờ chẵn (time(h, 0)) nên so sánh int giờ
+        # là đủ - rẻ hơn nhiều so với tạo và so sánh time object khi được
+        # poll liên tục
+        hour = (datetime.now() if check_time is None else check_time).hour
+
+        if self._overnight:
             # Ca đêm (ví dụ: 20:00 → 08:00): trong giờ nếu >= start HOẶC < end
-            return current_time >= self.start_time or current_time < self.end_time
-        else:
-            # Ca ngày (ví dụ: 08:00 → 18:00): trong giờ nếu >= start VÀ < end
-            return self.start_time <= current_time < self.end_time
+            return hour >= self.start_hour or hour < self.end_hour
+        # Ca ngày (ví dụ: 08:00 → 18:00): trong giờ nếu >= start VÀ < end
+        return self.start_hour <= hour < self.end_hour
     
     def can_run_tasks(self) -> bool:
         """